@@ -4,10 +4,43 @@ Focuses on security, privacy, and data exfiltration analysis.
 """
 
 import os
-from typing import Dict, Any, Optional
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import litellm
 from litellm import completion
+from src.utils.cache import ResultCache, content_digest
 from src.utils.logger import logger
 
+try:
+    import tiktoken
+except ImportError:
+    # Optional: without it, token counts are estimated from the character count
+    tiktoken = None
+
+# Most files analyze_batch() puts in one prompt
+LLM_BATCH_MAX_FILES = 10
+
+# Tokens of the context window kept free for the model's answer
+LLM_RESPONSE_TOKEN_BUDGET = 2048
+
+# Used when litellm doesn't know the model's context window
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# USD per 1K (input, output) tokens, for estimate_cost()
+MODEL_PRICES_PER_1K = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4-turbo": (0.01, 0.03),
+}
+
+# Typical length of one analysis answer, for estimate_cost()
+ESTIMATED_RESPONSE_TOKENS = 500
+
+# LLM requests analyze_batch() keeps in flight at once
+LLM_CONCURRENCY = 8
+
 class LLMAnalyzer:
     """
     Handles LLM interactions for code analysis.
@@ -20,14 +53,38 @@ class LLMAnalyzer:
     - Network communication patterns
     
     Currently uses a fixed model configuration, but could be made configurable in the future.
+
+    Results are cached by (model, prompt template, code) both in memory and on disk,
+    so identical code is only ever sent to the LLM once.
+
+    analyze_batch() packs several small files into one prompt to save round-trips,
+    and sends up to `max_concurrency` prompts at once.
     """
 
-    def __init__(self):
+    def __init__(self, use_cache: bool = True, max_concurrency: int = LLM_CONCURRENCY):
         self.model = "gpt-3.5-turbo"  # Default model, could be made configurable
         self._load_prompt_template()
+        self._cache = ResultCache("llm") if use_cache else None
+        self._memo: Dict[str, Dict[str, Any]] = {}
+        self._enc = self._load_encoding()
+        self.max_concurrency = max_concurrency
+
+    def _load_encoding(self):
+        """ tiktoken encoding for the model (cl100k_base if tiktoken doesn't know it), or None. """
+        if tiktoken is None:
+            return None
+        try:
+            try:
+                return tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken downloads encodings on first use, which fails offline
+            logger.warning(f"Could not load tiktoken encoding, estimating token counts instead: {e}")
+            return None
 
     def _load_prompt_template(self) -> None:
-        """Load the analysis prompt template from file"""
+        """Load the analysis prompt templates from file"""
         prompt_path = os.path.join(os.path.dirname(__file__), "prompts", "analysis_prompt.txt")
         try:
             with open(prompt_path, 'r', encoding='utf-8') as f:
@@ -37,6 +94,38 @@ class LLMAnalyzer:
             # Fallback to basic prompt if file can't be loaded
             self.prompt_template = "Analyze this code for security issues: {code}"
 
+        batch_prompt_path = os.path.join(os.path.dirname(__file__), "prompts", "batch_analysis_prompt.txt")
+        try:
+            with open(batch_prompt_path, 'r', encoding='utf-8') as f:
+                self.batch_prompt_template = f.read()
+        except Exception as e:
+            logger.error(f"Failed to load batch prompt template: {e}")
+            self.batch_prompt_template = (
+                "Analyze these files for security issues: {files}\n"
+                'Reply with a JSON object mapping each file path to {{"findings": "...", "severity": "...", "confidence": "..."}}.'
+            )
+
+    def _cache_key(self, template: str, code_content: str) -> str:
+        return content_digest(f"{self.model}|{template}|{code_content}".encode("utf-8"))
+
+    def _get_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        """ Look `key` up in the in-memory memo, then the on-disk cache. """
+        if key in self._memo:
+            return self._memo[key]
+        if self._cache is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._memo[key] = cached
+                return cached
+        return None
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        # Errors are not cached, so a transient failure is retried next time
+        if "error" not in result:
+            self._memo[key] = result
+            if self._cache is not None:
+                self._cache.set(key, result)
+
     def analyze_code(self, code_content: str, file_path: str = "") -> Dict[str, Any]:
         """
         Analyze a piece of code using the LLM.
@@ -52,6 +141,128 @@ class LLMAnalyzer:
             - Network communications
             - Telemetry implementations
         """
+        key = self._cache_key(self.prompt_template, code_content)
+        cached = self._get_cached(key)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for {file_path or 'snippet'}")
+            return cached
+
+        result = self._analyze_uncached(code_content)
+        self._store(key, result)
+        return result
+
+    def analyze_batch(self, files: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze several (file_path, code_content) pairs, packing up to LLM_BATCH_MAX_FILES
+        of them into each prompt as long as they fit the model's context window.
+        Files too large to share a prompt are analyzed on their own via analyze_code().
+
+        Returns {file_path: findings} with findings shaped like analyze_code()'s.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for file_path, code_content in files:
+            key = self._cache_key(self.batch_prompt_template, code_content)
+            cached = self._get_cached(key)
+            if cached is not None:
+                results[file_path] = cached
+            else:
+                pending.append((file_path, code_content, key))
+
+        budget = (self._context_window() - LLM_RESPONSE_TOKEN_BUDGET
+                  - self.count_tokens(self.batch_prompt_template))
+        singles, batches = [], []
+        batch, batch_tokens = [], 0
+        for file_path, code_content, key in pending:
+            tokens = self.count_tokens(code_content)
+            if tokens > budget:
+                singles.append((file_path, code_content))
+                continue
+            if batch and (len(batch) >= LLM_BATCH_MAX_FILES or batch_tokens + tokens > budget):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append((file_path, code_content, key))
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+
+        if not singles and not batches:
+            return results
+
+        # Each request is mostly waiting on the network, so overlap them in threads
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) as executor:
+            single_futures = [
+                (file_path, executor.submit(self.analyze_code, code_content, file_path))
+                for file_path, code_content in singles
+            ]
+            batch_futures = [executor.submit(self._analyze_batch_uncached, batch) for batch in batches]
+            for file_path, future in single_futures:
+                results[file_path] = future.result()
+            for future in batch_futures:
+                results.update(future.result())
+
+        # Same order as `files`, whatever order the requests finished in
+        return {file_path: results[file_path] for file_path, _ in files}
+
+    def _analyze_batch_uncached(self, batch: List[Tuple[str, str, str]]) -> Dict[str, Dict[str, Any]]:
+        """ Send one prompt for all files in `batch` and split the JSON answer back per file. """
+        files_block = "\n".join(f'<file path="{file_path}">\n{code_content}\n</file>' for file_path, code_content, _ in batch)
+        kwargs = {}
+        if self._supports_json_mode():
+            kwargs["response_format"] = {"type": "json_object"}
+
+        try:
+            response = completion(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a security-focused code analyzer. You always answer with a single JSON object."},
+                    {"role": "user", "content": self.batch_prompt_template.format(files=files_block)}
+                ],
+                temperature=0.1,  # Low temperature for more consistent analysis
+                **kwargs
+            )
+            parsed = json.loads(response.choices[0].message.content)
+            if not isinstance(parsed, dict):
+                raise ValueError("expected a JSON object")
+        except Exception as e:
+            logger.error(f"Error during batched LLM analysis of {len(batch)} files: {e}")
+            return {file_path: {"error": str(e)} for file_path, _, _ in batch}
+
+        results = {}
+        for file_path, _, key in batch:
+            entry = parsed.get(file_path)
+            if not isinstance(entry, dict):
+                results[file_path] = {"error": "No analysis returned for this file"}
+                continue
+            results[file_path] = {
+                "findings": entry.get("findings", ""),
+                "severity": entry.get("severity", "unknown"),
+                "confidence": entry.get("confidence", "medium")
+            }
+            self._store(key, results[file_path])
+        return results
+
+    def count_tokens(self, text: str) -> int:
+        """ Token count of `text` for this model (estimated if tiktoken is unavailable). """
+        if self._enc is not None:
+            # disallowed_special=() so code that happens to contain e.g. "<|endoftext|>" still counts
+            return len(self._enc.encode(text, disallowed_special=()))
+        return len(text) // 4  # Rough approximation
+
+    def _context_window(self) -> int:
+        try:
+            return litellm.get_model_info(self.model).get("max_input_tokens") or DEFAULT_CONTEXT_WINDOW
+        except Exception:
+            return DEFAULT_CONTEXT_WINDOW
+
+    def _supports_json_mode(self) -> bool:
+        try:
+            return "response_format" in (litellm.get_supported_openai_params(model=self.model) or [])
+        except Exception:
+            return False
+
+    def _analyze_uncached(self, code_content: str) -> Dict[str, Any]:
+        """ Send `code_content` to the LLM and parse the response. """
         try:
             # Construct the prompt
             full_prompt = self.prompt_template.format(code=code_content)
@@ -96,10 +307,13 @@ class LLMAnalyzer:
     def estimate_cost(self, code_content: str) -> Dict[str, Any]:
         """
         Estimate the cost of analyzing this code based on token count.
-        This is a placeholder implementation.
+        The prompt is counted exactly (with tiktoken installed); the answer is
+        assumed to be ESTIMATED_RESPONSE_TOKENS long. Models missing from
+        MODEL_PRICES_PER_1K are estimated at 0.0.
         """
-        # TODO: Implement actual token counting and cost estimation
+        input_tokens = self.count_tokens(self.prompt_template.format(code=code_content))
+        in_price, out_price = MODEL_PRICES_PER_1K.get(self.model, (0.0, 0.0))
         return {
-            "estimated_tokens": len(code_content) // 4,  # Rough approximation
-            "estimated_cost": 0.0  # TODO: Implement actual cost calculation
+            "estimated_tokens": input_tokens,
+            "estimated_cost": (input_tokens * in_price + ESTIMATED_RESPONSE_TOKENS * out_price) / 1000
         }
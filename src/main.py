@@ -2,7 +2,7 @@
 """
 Main entry point of the application.
 
-The code uses fetch_code_source() to handle various input types:
+The code uses fetch_code_sources() to fetch one or more inputs of various types:
 - GitHub repositories:
   - https://github.com/user/repo
   - https://github.com/user/repo.git
@@ -22,89 +22,140 @@ The code uses fetch_code_source() to handle various input types:
 
 The code will scan the fetched source using:
 - Pattern matching builtin plugin (always enabled)
-- Python AST analysis (enabled by default, disable with --no-ast)
+- Bandit for Python (enabled by default, disable with --no-bandit)
 - ESLint for JS/TS (enabled by default, disable with --no-eslint)
+- Dependency vulnerability checks (always enabled)
+- LLM analysis (disabled by default, enable with --llm)
+
+Next to the Markdown report (reports/<name>.md), the raw plugin results are
+written to reports/<name>.json for tools that post-process scans: the .md is
+the human view, the .json the complete data.
 
 Usage:
-  python -m src.main <input> [--no-ast] [--no-eslint]
+  python -m src.main <input> [<input> ...] [--no-bandit] [--no-eslint] [--llm]
 """
 
-import sys
 import os
 import shutil
+import sys
 import argparse
 
 #Utilities
-from src.utils.repo_handler import fetch_code_source
+from src.utils import fast_json
+from src.utils.repo_handler import fetch_code_sources
 from src.utils.report_generator import generate_report, get_report_filename
 from src.utils.logger import logger
+from src.utils.config import MAX_SCAN_BYTES, REPORT_BUFFER_BYTES, REPORT_DESCRIPTION_MAX_CHARS
 
 #Plugins to actual scanning tools
 from src.plugins.regex_plugin import RegexPlugin
 from src.plugins.bandit_plugin import BanditPlugin
 from src.plugins.eslint_plugin import ESLintPlugin
 from src.plugins.dependency_plugin import DependencyPlugin
+from src.plugins.llm_plugin import LLMPlugin
 #from src.plugins.semgrep_plugin import SemgrepPlugin
 
+def _int_at_least(minimum: int):
+    """ argparse type for an integer of at least `minimum`. """
+    def parse(value: str) -> int:
+        try:
+            number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {number}")
+        return number
+    return parse
+
+
+def _is_fetched_copy(final_path: str) -> bool:
+    """ Whether `final_path` is a temporary directory or file created by the fetch functions. """
+    # This logic might need more robust detection in real usage.
+    return final_path.startswith("/tmp/repo_scan_") or "repo_scan_" in final_path
+
+
+def scan_source(repo_input: str, final_path: str, args: argparse.Namespace) -> None:
+    """ Run the enabled plugins over the fetched `final_path` and write its report. """
+    logger.info(f"Code for {repo_input} fetched at: {final_path}")
+
+    # Initialize plugins
+    plugins = [RegexPlugin(max_workers=args.jobs, max_file_size=args.max_file_size, use_cache=not args.no_cache)]
+    if not args.no_bandit:
+        plugins.append(BanditPlugin(use_cache=not args.no_cache))
+    if not args.no_eslint:
+        # ESLint's cache is keyed by absolute file path, so a freshly fetched temp copy could never hit it
+        plugins.append(ESLintPlugin(use_cache=not args.no_cache and not _is_fetched_copy(final_path)))
+    plugins.append(DependencyPlugin(use_cache=not args.no_cache))
+    # plugins.append(SemgrepPlugin()), ...
+    if args.llm:
+        plugins.append(LLMPlugin(use_cache=not args.no_llm_cache))
+
+    scan_results = {}
+    for plugin in plugins:
+        logger.info(f"Running plugin: {plugin.name}")
+        # We're defining the convention that plugins get the directory name and choose for themselves which files to process
+        plugin_result = plugin.scan(final_path)
+        scan_results[plugin.name] = plugin_result
+
+
+    # Generate and save report, writing it out as it is generated
+    output_dir = "reports"
+    report_filename = args.output if args.output else get_report_filename(repo_input)
+    report_path = os.path.join(output_dir, report_filename)
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(report_path, 'w', encoding='utf-8', buffering=REPORT_BUFFER_BYTES) as f:
+        generate_report(scan_results, output_dir, out=f,
+                        max_description_chars=0 if args.full_descriptions else REPORT_DESCRIPTION_MAX_CHARS)
+
+    logger.info(f"Report saved to: {report_path}")
+
+    results_path = os.path.splitext(report_path)[0] + ".json"
+    if results_path == report_path:
+        # -o was given a .json name; don't overwrite the report with the results
+        results_path += ".json"
+    with open(results_path, 'wb') as f:
+        f.write(fast_json.dumps(scan_results))
+    logger.info(f"Raw results saved to: {results_path}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Scan a code source for suspicious code.")
-    parser.add_argument("repo_path", help="GitHub, PyPI, NPM, remote file, local dir/file")
+    parser.add_argument("repo_path", nargs="+",
+                        help="GitHub, PyPI, NPM, remote file, local dir/file; several are fetched concurrently and get a report each")
     parser.add_argument("--no-bandit", action="store_true", help="Disable Python Bandit scanning")
     parser.add_argument("--no-eslint", action="store_true", help="Disable ESLint scanning for JS/TS files")
-    parser.add_argument("-o", "--output", help="Custom output filename for the report")
+    parser.add_argument("-o", "--output", help="Custom output filename for the report (single input only)")
+    parser.add_argument("--max-file-size", type=_int_at_least(0), default=MAX_SCAN_BYTES,
+                        help=f"Skip pattern scanning of files larger than this many bytes (default {MAX_SCAN_BYTES}, 0 = no limit)")
+    parser.add_argument("-j", "--jobs", type=_int_at_least(1), default=None,
+                        help="Worker processes for pattern scanning (default: CPU count, 1 = scan serially)")
+    parser.add_argument("--no-cache", action="store_true", help="Don't reuse or store cached scan results")
+    parser.add_argument("--full-descriptions", action="store_true",
+                        help="Don't shorten long vulnerability descriptions and Bandit issue texts in the report")
+    parser.add_argument("--llm", action="store_true", help="Also run LLM-based analysis (needs LiteLLM and API credentials)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Always query the LLM, even for code it has already analyzed")
     args = parser.parse_args()
+    if args.output and len(args.repo_path) > 1:
+        parser.error("-o/--output can only be used with a single input")
 
-    repo_input = args.repo_path
-    use_bandit = not args.no_bandit
-    use_eslint = not args.no_eslint
-
-    logger.info(f"Starting scan for: {repo_input}. Bandit={use_bandit}, ESLint={use_eslint}")
-    final_path = fetch_code_source(repo_input)
-    logger.info(f"Code fetched at: {final_path}")
-
-    # If final_path is a cloned GitHub repo or something fetched,
-    # and we want to remove it afterward, we can keep track of that.
-    # For now, let's assume we always clean up if we created a temp directory.
-    # We'll only cleanup if we detect a temporary directory created by fetch functions:
-    cleanup_needed = final_path.startswith("/tmp/repo_scan_") or "repo_scan_" in final_path
+    logger.info(f"Starting scan for: {', '.join(args.repo_path)}. Bandit={not args.no_bandit}, ESLint={not args.no_eslint}")
+    final_paths = fetch_code_sources(args.repo_path, use_cache=not args.no_cache)
 
     try:
-
-        # Initialize plugins
-        plugins = [
-            RegexPlugin(),
-            BanditPlugin(),
-            ESLintPlugin(),
-            DependencyPlugin(),
-            # SemgrepPlugin(), ...
-        ]
-        
-        scan_results = {}
-        for plugin in plugins:
-            logger.info(f"Running plugin: {plugin.name}")
-            # We're defining the convention that plugins get the directory name and choose for themselves which files to process
-            plugin_result = plugin.scan(final_path)
-            scan_results[plugin.name] = plugin_result
-
-
-        # Generate and save report
-        report = generate_report(scan_results)
-        output_dir = "reports"
-        report_filename = args.output if args.output else get_report_filename(repo_input)
-        report_path = os.path.join(output_dir, report_filename)
-        
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report)
-        
-        logger.info(f"Report saved to: {report_path}")
+        for repo_input, final_path in zip(args.repo_path, final_paths):
+            if final_path is not None:
+                scan_source(repo_input, final_path, args)
     finally:
-        # Clean up if we fetched code into a temp directory.
-        # This logic might need more robust detection in real usage.
-        # For now, just check if final_path is a temporary directory.
-        if cleanup_needed and not os.path.isfile(final_path):
-            logger.debug(f"Removing temporary directory: {final_path}")
-            shutil.rmtree(final_path, ignore_errors=True)
-
+        # Clean up whatever was fetched into a temp directory
+        for final_path in final_paths:
+            if final_path is not None and _is_fetched_copy(final_path) and not os.path.isfile(final_path):
+                logger.debug(f"Removing temporary directory: {final_path}")
+                shutil.rmtree(final_path, ignore_errors=True)
+
+    if None in final_paths:
+        # The failed fetches were logged; the others were still scanned
+        sys.exit(1)
     logger.info("Scan complete.")
 
 
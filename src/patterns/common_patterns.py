@@ -7,6 +7,7 @@ in identifying potentially malicious or suspicious content.
 """
 
 import re
+from functools import lru_cache
 
 SUSPICIOUS_PATTERNS = {
     # Existing patterns from before
@@ -30,3 +31,47 @@ SUSPICIOUS_PATTERNS = {
     # This will likely catch even references in comments or docstrings.
     "vm_related_terms": re.compile(r"\b(virtualbox|vmware|sandbox|qemu|debugger)\b"),
 }
+
+# Literal substrings, at least one of which must be present in a file for the
+# matching pattern above to have any chance of matching. The scanner finds all
+# of these in a single pass and skips the regexes whose literals are absent.
+# Patterns without an entry here (URLs, IPs, emails) are always run.
+PATTERN_LITERALS = {
+    "eval_call": ("eval",),
+    "exec_call": ("exec",),
+    # importlib.import_module, __import__ and "import " all contain "import"
+    "code_import": ("import",),
+    "keylogger_keyword": ("keylog",),
+    "vm_related_terms": ("virtualbox", "vmware", "sandbox", "qemu", "debugger"),
+}
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern: str, flags: int = 0) -> "re.Pattern":
+    """
+    Compile a pattern built at runtime (bytes variants, future user-supplied patterns),
+    caching by source so the same string is never compiled twice.
+    Static patterns should simply be compiled at module level.
+    """
+    return re.compile(pattern, flags)
+
+
+def to_bytes_pattern(regex: "re.Pattern") -> "re.Pattern":
+    """
+    Compile a bytes version of a str pattern, for matching raw file bytes or an mmap
+    without decoding.
+
+    The pattern text is the same, but bytes patterns give \\s, \\w, \\d and \\b their ASCII
+    meaning, so matches can differ from the str pattern's on non-ASCII text:
+    - non-ASCII whitespace (U+00A0, U+2003, ...) is not \\s, so http_url's [^\\s'"]+
+      runs on through it instead of stopping there;
+    - non-ASCII letters are not \\w, so "\\beval" also matches right after "é";
+    - non-ASCII digits are not \\d.
+    On ASCII text the results are identical.
+    """
+    # re.UNICODE is implied for str patterns but not allowed for bytes patterns
+    return compile_pattern(regex.pattern.encode("utf-8"), regex.flags & ~re.UNICODE)
+
+
+# Bytes versions of the patterns, for matching raw file bytes or an mmap
+SUSPICIOUS_PATTERNS_BYTES = {name: to_bytes_pattern(regex) for name, regex in SUSPICIOUS_PATTERNS.items()}
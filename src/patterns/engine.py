@@ -0,0 +1,299 @@
+# project_root/src/patterns/engine.py
+"""
+Optional linear-time regex engines used to decide which patterns can match a file.
+
+Python's `re` backtracks, so a pathological line can make a pattern very slow.
+If Hyperscan (or, failing that, Google's RE2) is installed, we compile every
+pattern into one automaton and scan each file once to learn which patterns
+match at all. Only those are then run through `re` to collect the matches,
+so findings are exactly what `re` alone would return.
+
+Without either engine, every pattern is simply run (see PresenceFilter.matching).
+
+ripgrep_matches() does the presence check for a whole tree at once with
+ripgrep, when the `rg` binary is installed, streaming the matching files.
+
+linear_findall() gives an RE2-backed drop-in for a pattern's findall(), so
+collecting the matches is linear-time too.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set
+
+from src.utils.logger import logger
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+
+class PresenceFilter:
+    """
+    Built from {name: bytes regex}. matching(content) returns the names of the
+    patterns that match somewhere in `content`, or None when no engine is available.
+
+    Patterns the engine cannot compile (lookarounds, backreferences, ...) are
+    always reported as possible matches.
+    """
+
+    def __init__(self, patterns: Dict[str, "re.Pattern"]):
+        self.names = list(patterns)
+        self.unsupported: Set[str] = set()
+        self._db = None
+        self._set = None
+
+        if hyperscan is not None:
+            self._db = self._build_hyperscan(patterns)
+        elif re2 is not None:
+            self._set = self._build_re2_set(patterns)
+
+    def _build_hyperscan(self, patterns: Dict[str, "re.Pattern"]):
+        expressions, ids, flags = [], [], []
+        for idx, (name, regex) in enumerate(patterns.items()):
+            hs_flags = hyperscan.HS_FLAG_SINGLEMATCH
+            if regex.flags & re.IGNORECASE:
+                hs_flags |= hyperscan.HS_FLAG_CASELESS
+            try:
+                # Compile alone first so one unsupported pattern can't sink the whole database
+                hyperscan.Database().compile(expressions=[regex.pattern], ids=[idx], flags=[hs_flags])
+            except hyperscan.error:
+                self.unsupported.add(name)
+                continue
+            expressions.append(regex.pattern)
+            ids.append(idx)
+            flags.append(hs_flags)
+
+        if not expressions:
+            return None
+        db = hyperscan.Database()
+        db.compile(expressions=expressions, ids=ids, flags=flags)
+        logger.debug(f"Hyperscan prefilter built for {len(expressions)} patterns")
+        return db
+
+    def _build_re2_set(self, patterns: Dict[str, "re.Pattern"]):
+        # Same translation as linear_findall(), so the set matches wherever re does
+        pattern_set = re2.Set.SearchSet(_re2_options())
+        self._set_ids = []
+        for name, regex in patterns.items():
+            source = _re2_source(regex)
+            if source is not None:
+                try:
+                    pattern_set.Add(source)
+                    self._set_ids.append(name)
+                    continue
+                except re2.error:
+                    pass
+            self.unsupported.add(name)
+
+        if not self._set_ids:
+            return None
+        pattern_set.Compile()
+        logger.debug(f"RE2 prefilter built for {len(self._set_ids)} patterns")
+        return pattern_set
+
+    def matching(self, content) -> Optional[Set[str]]:
+        """
+        Names of the patterns that match somewhere in `content` (bytes or mmap),
+        plus the unsupported ones. None means "no engine, assume all".
+        """
+        if self._db is not None:
+            found = set(self.unsupported)
+
+            def on_match(idx, start, end, flags, context):
+                found.add(self.names[idx])
+
+            try:
+                self._db.scan(content, match_event_handler=on_match)
+            except hyperscan.error as e:
+                logger.debug(f"Hyperscan scan failed, running all patterns: {e}")
+                return None
+            return found
+
+        if self._set is not None:
+            found = set(self.unsupported)
+            # Match() returns None rather than an empty list when nothing matched
+            found.update(self._set_ids[idx] for idx in self._set.Match(content) or ())
+            return found
+
+        return None
+
+
+def _re2_whitespace(source: bytes) -> Optional[bytes]:
+    """
+    `source` with \\s spelled as the POSIX [:space:] class, which unlike RE2's \\s
+    includes \\v, as re's does. None if a \\S inside [...] would need rewriting too.
+    """
+    out = bytearray()
+    in_class = False
+    idx = 0
+    while idx < len(source):
+        char = source[idx:idx + 1]
+        if char == b"\\" and idx + 1 < len(source):
+            escaped = source[idx + 1:idx + 2]
+            if escaped == b"s":
+                out += b"[:space:]" if in_class else b"[[:space:]]"
+            elif escaped == b"S":
+                if in_class:
+                    return None
+                out += b"[^[:space:]]"
+            else:
+                out += char + escaped
+            idx += 2
+            continue
+        if not in_class and char == b"[":
+            in_class = True
+            out += char
+            idx += 1
+            # A ] right after [ or [^ is a literal, not the end of the class
+            for prefix in (b"^", b"]"):
+                if source[idx:idx + 1] == prefix:
+                    out += prefix
+                    idx += 1
+            continue
+        if in_class and char == b"]":
+            in_class = False
+        out += char
+        idx += 1
+    return bytes(out)
+
+
+def _re2_source(regex: "re.Pattern") -> Optional[bytes]:
+    """
+    The source of bytes `regex` rewritten so RE2 matches exactly where re does, with
+    its flags inlined. None if it can't be (verbose mode, a non-multiline $, ...).
+    """
+    if regex.flags & re.VERBOSE:
+        return None
+    source = _re2_whitespace(regex.pattern)
+    if source is None:
+        return None
+    if b"$" in source and not regex.flags & re.MULTILINE:
+        # re's $ also matches before a trailing newline, RE2's only at the very end
+        return None
+    inline = b"".join(flag for bit, flag in ((re.IGNORECASE, b"i"), (re.MULTILINE, b"m"), (re.DOTALL, b"s"))
+                      if regex.flags & bit)
+    if inline:
+        source = b"(?" + inline + b")" + source
+    return source
+
+
+def _re2_options() -> "re2.Options":
+    """ Latin-1 mode, so like re RE2 treats the content as raw bytes rather than UTF-8. """
+    options = re2.Options()
+    options.encoding = re2.Options.Encoding.LATIN1
+    options.log_errors = False
+    return options
+
+
+def linear_findall(regex: "re.Pattern") -> Optional[Callable]:
+    """
+    A function returning exactly what regex.findall(content) would, computed by RE2
+    in time linear in len(content), for bytes `regex` and bytes or mmap content.
+    None if RE2 isn't installed or can't match the pattern the way re does
+    (lookarounds, backreferences, verbose mode, a non-multiline $, ...).
+
+    RE2 runs in Latin-1 mode, so like re it treats the content as raw bytes rather
+    than UTF-8. Built on finditer(), since google-re2's findall() can't take an mmap.
+    """
+    if re2 is None:
+        return None
+    source = _re2_source(regex)
+    if source is None:
+        return None
+    try:
+        compiled = re2.compile(source, _re2_options())
+    except re2.error:
+        return None
+
+    finditer = compiled.finditer
+    if regex.groups == 0:
+        return lambda content: [m.group() for m in finditer(content)]
+    if regex.groups == 1:
+        # re.findall() gives b"" for a group that didn't take part in the match
+        return lambda content: [m.group(1) or b"" for m in finditer(content)]
+    return lambda content: [m.groups(b"") for m in finditer(content)]
+
+
+class RipgrepError(Exception):
+    """ ripgrep exited with an error, possibly after reporting some files. """
+
+
+def ripgrep_matches(patterns: Dict[str, "re.Pattern"], target_path: str, exclude_dirs: Iterable[str] = (),
+                    exclude_extensions: Iterable[str] = ()) -> Optional[Iterator[str]]:
+    """
+    Iterator over the files under `target_path` in which ripgrep finds at least one of the
+    bytes `patterns`, yielded as ripgrep reports them, so callers can start on the first
+    files while it is still searching. Every file it doesn't report is guaranteed to have
+    no match, so callers can skip it entirely.
+
+    ripgrep walks and searches in parallel in native code, which beats opening every
+    file from Python when most files are clean. Directories named in `exclude_dirs` and
+    files with one of `exclude_extensions` (matched case-insensitively) are not searched.
+
+    Returns None if `rg` is missing. If ripgrep exits with an error (an unreadable file,
+    a pattern its regex syntax rejects, ...), the iterator raises RipgrepError after the
+    files reported so far; callers should then search the files it hasn't yielded.
+
+    The search is made to find at least what `re` would:
+    - (?-u) gives \\b, \\w, \\s, \\d the ASCII meaning they have in bytes patterns;
+    - --multiline lets \\s and [^...] cross newlines, as they do for re;
+    - --text and --encoding none search binary files and raw bytes, with no transcoding;
+    - --no-ignore and --hidden disable ignore files and hidden-file skipping;
+    - --follow reaches symlinked files, which a directory walk lists (it also enters
+      symlinked directories, so callers that don't should filter those paths out).
+    """
+    rg = shutil.which("rg")
+    if rg is None:
+        return None
+
+    with tempfile.NamedTemporaryFile(mode="wb", suffix=".rgpat", delete=False) as f:
+        for regex in patterns.values():
+            prefix = b"(?i-u)" if regex.flags & re.IGNORECASE else b"(?-u)"
+            f.write(prefix + regex.pattern + b"\n")
+        pattern_file = f.name
+
+    excludes = [arg for name in sorted(exclude_dirs) for arg in ("--glob", f"!{name}")]
+    excludes += [arg for ext in sorted(exclude_extensions) for arg in ("--iglob", f"!*{ext}")]
+    cmd = [rg, "--files-with-matches", "--null", "--no-messages", "--multiline", "--text",
+           "--encoding", "none", "--no-ignore", "--hidden", "--follow", *excludes,
+           "-f", pattern_file, target_path]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        os.unlink(pattern_file)
+        logger.debug(f"Could not run ripgrep: {e}")
+        return None
+    return _iter_ripgrep_output(proc, pattern_file)
+
+
+def _iter_ripgrep_output(proc: subprocess.Popen, pattern_file: str) -> Iterator[str]:
+    try:
+        pending = b""
+        # read1() returns whatever ripgrep has written so far rather than waiting for a full buffer
+        while chunk := proc.stdout.read1(64 * 1024):
+            *paths, pending = (pending + chunk).split(b"\0")
+            for path in paths:
+                if path:
+                    yield os.fsdecode(path)
+        returncode = proc.wait()
+    finally:
+        if proc.poll() is None:
+            # The caller stopped early
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        os.unlink(pattern_file)
+
+    # 0: some files matched, 1: none did, 2: an error (unreadable file, bad pattern, ...)
+    if returncode not in (0, 1):
+        raise RipgrepError(f"ripgrep exited with {returncode}")
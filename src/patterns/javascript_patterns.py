@@ -18,6 +18,7 @@ is often a strong indicator.
 """
 
 import re
+from src.patterns.common_patterns import to_bytes_pattern
 
 JAVASCRIPT_SUSPICIOUS_PATTERNS = {
     # Existing JS patterns:
@@ -45,3 +46,21 @@ JAVASCRIPT_SUSPICIOUS_PATTERNS = {
     # This is heuristic; it may be safe in actual browser code.
     "js_document_write": re.compile(r"\bdocument\.write\s*\("),
 }
+
+# Literal substrings that must be present for the pattern to match
+# (see PATTERN_LITERALS in common_patterns.py).
+JAVASCRIPT_PATTERN_LITERALS = {
+    "js_require_net": ("require('net')", 'require("net")'),
+    "js_require_child_process": ("require('child_process')", 'require("child_process")'),
+    "js_require_nodemailer": ("require('nodemailer')", 'require("nodemailer")'),
+    "js_new_function_call": ("Function",),
+    # Most files never mention WSH/ActiveX, so these literals rule the regexes out cheaply
+    "js_activexobject": ("ActiveXObject",),
+    "js_fso": ("Scripting.FileSystemObject",),
+    "js_wscript": ("WScript",),
+    "js_shell_application": ("Shell.Application",),
+    "js_document_write": ("document.write",),
+}
+
+# Bytes versions of the above, for files that are mmapped rather than read into a str
+JAVASCRIPT_SUSPICIOUS_PATTERNS_BYTES = {name: to_bytes_pattern(regex) for name, regex in JAVASCRIPT_SUSPICIOUS_PATTERNS.items()}
@@ -10,6 +10,7 @@ Focus on imports and calls known for enabling malicious behaviors:
 """
 
 import re
+from src.patterns.common_patterns import to_bytes_pattern
 
 PYTHON_SUSPICIOUS_PATTERNS = {
     "py_import_smtplib": re.compile(r"\bimport\s+smtplib\b"),
@@ -22,3 +23,17 @@ PYTHON_SUSPICIOUS_PATTERNS = {
     # Already have eval/exec in common patterns, but we could add more python-specific if needed.
 }
 
+# Literal substrings that must be present for the pattern to match
+# (see PATTERN_LITERALS in common_patterns.py). The module name is rarer than "import".
+PYTHON_PATTERN_LITERALS = {
+    "py_import_smtplib": ("smtplib",),
+    "py_import_socket": ("socket",),
+    "py_import_pynput": ("pynput",),
+    "py_import_keyboard": ("keyboard",),
+    "py_import_subprocess": ("subprocess",),
+    "py_subprocess_call": ("subprocess.",),
+    "py_import_requests": ("requests",),
+}
+
+# Bytes versions of the above, for files that are mmapped rather than read into a str
+PYTHON_SUSPICIOUS_PATTERNS_BYTES = {name: to_bytes_pattern(regex) for name, regex in PYTHON_SUSPICIOUS_PATTERNS.items()}
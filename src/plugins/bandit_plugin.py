@@ -1,38 +1,113 @@
-import subprocess
-import json
-from typing import Dict, Any
+import os
+import asyncio
+from src.utils import fast_json
+from typing import Dict, Any, List
 from .base_plugin import BasePlugin
+from src.utils.cache import ResultCache, content_digest
+from src.utils.config import SKIP_DIRS
 from src.utils.logger import logger
+from src.utils.subprocess_runner import run_commands
+
+# Most Python files passed to one Bandit process
+BANDIT_BATCH_SIZE = 128
+
+# Fewest files per process when spreading a small repo over the CPUs; below
+# this, Bandit's own startup (loading its plugins) outweighs the parallelism
+BANDIT_MIN_BATCH_SIZE = 16
 
 class BanditPlugin(BasePlugin):
+    def __init__(self, use_cache: bool = True):
+        # Results per batch of files, keyed by their paths, sizes and mtimes
+        self.cache = ResultCache("bandit") if use_cache else None
+
     def scan(self, target_path: str) -> Dict[str, Any]:
         """
         Run Bandit against the specified directory or file, parse the results, 
         and return them in a standard dictionary format.
+
+        Directories are split into batches of .py files, and one Bandit process
+        per batch runs concurrently (up to one per CPU).
         """
         logger.info(f"Running Bandit plugin on: {target_path}")
+        return asyncio.run(self._scan_async(target_path))
+
+    async def _scan_async(self, target_path: str) -> Dict[str, Any]:
+        """
+        Shard the Python files under `target_path`, run Bandit over the shards
+        concurrently, then merge the JSON results once all processes are done.
+        """
+        result_dict = {}
+
+        if os.path.isdir(target_path):
+            file_list = []
+            for root, dirs, files in os.walk(target_path):
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+                file_list.extend(os.path.join(root, f) for f in files if f.endswith(".py"))
+        else:
+            file_list = [target_path]
+
+        if not file_list:
+            return result_dict
 
         # Example: bandit requires a directory or file, plus a format specifier
         # We'll assume bandit is installed. If not, handle the error gracefully.
-        result_dict = {}
-        try:
-            cmd = ["bandit", "-r", target_path, "-f", "json"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+        # Enough batches to keep every CPU busy, but no more than BANDIT_BATCH_SIZE files each
+        cpus = os.cpu_count() or 1
+        batch_size = min(BANDIT_BATCH_SIZE, max(BANDIT_MIN_BATCH_SIZE, -(-len(file_list) // cpus)))
+        batches = [file_list[start:start + batch_size] for start in range(0, len(file_list), batch_size)]
+
+        issues: List[Dict[str, Any]] = []
+        pending = []
+        for batch in batches:
+            key = self._batch_key(batch)
+            cached = self.cache.get(key) if key and self.cache else None
+            if cached is not None:
+                issues.extend(cached)
+            else:
+                pending.append((batch, key))
+        if len(pending) < len(batches):
+            logger.debug(f"Bandit: reused cached results for {len(batches) - len(pending)} of {len(batches)} batches")
+
+        results = await run_commands([["bandit", "-f", "json", "-q", *batch] for batch, _ in pending])
+
+        for (batch, key), result in zip(pending, results):
+            if result.returncode is None:
+                # Not installed / not runnable; already logged
+                continue
             if result.returncode not in (0,1):
                 # 0 = no issues found, 1 = issues found, other is error
                 logger.error(f"Bandit returned error code: {result.returncode}")
-                return result_dict
+                continue
 
-            output_json = json.loads(result.stdout)
-            logger.debug(f"Bandit Output: {output_json}")
+            try:
+                output_json = fast_json.loads(result.stdout)
+            except fast_json.JSONDecodeError as e:
+                logger.error(f"Error parsing Bandit output JSON: {e}")
+                continue
+            # Lazy %-args: the whole report is only turned into a string if debug logging is on
+            logger.debug("Bandit Output: %s", output_json)
 
             # Convert Bandit's output to a consistent shape for your final reporting
-            issues = output_json.get("results", [])
-            if issues:
-                result_dict["bandit_issues"] = issues
+            batch_issues = output_json.get("results", [])
+            issues.extend(batch_issues)
+            if key and self.cache:
+                self.cache.set(key, batch_issues)
 
-        except Exception as e:
-            logger.error(f"Error running Bandit: {e}")
+        if issues:
+            result_dict["bandit_issues"] = issues
 
         return result_dict
 
+    def _batch_key(self, file_paths: List[str]) -> str:
+        """
+        Cache key for a batch: its files' paths, sizes and mtimes, which change
+        whenever a file does, without reading any contents. Empty if a file can't be stat'ed.
+        """
+        parts = []
+        for file_path in file_paths:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return ""
+            parts.append(f"{os.path.abspath(file_path)}\0{st.st_size}\0{st.st_mtime_ns}")
+        return content_digest("\n".join(parts).encode("utf-8"))
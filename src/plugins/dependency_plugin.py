@@ -1,13 +1,50 @@
+import atexit
 import os
 import json
-import tomli
 from src.utils.logger import logger
 import re
+import shutil
 import subprocess
 import tempfile
-from pathlib import Path
-from typing import Dict, List, Tuple, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Any
 from src.plugins.base_plugin import BasePlugin
+from src.utils.cache import ResultCache, content_digest
+from src.utils import fast_json
+from src.utils.config import AUDIT_CACHE_TTL_SECONDS, SKIP_DIRS
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11: the same parser, packaged separately
+    import tomli as tomllib
+
+# Threads for parsing manifests and running audits; both mostly wait on I/O
+AUDIT_MAX_WORKERS = 8
+
+# Versions that pin a single release: bare PEP 440 versions, and plain semver for npm
+_PYTHON_EXACT_VERSION_RE = re.compile(r"^[0-9][0-9A-Za-z.+!-]*$")
+_NPM_EXACT_VERSION_RE = re.compile(r"^[0-9]+\.[0-9]+\.[0-9]+(?:[-+][0-9A-Za-z.-]+)?$")
+
+# Runs of separators that PEP 503 name normalization collapses to "-"
+_NAME_SEPARATORS_RE = re.compile(r"[-_.]+")
+
+# Package names as OSV knows them: PEP 508 project names (after dropping [extras]),
+# and npm names, optionally scoped
+_PYTHON_NAME_RE = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?$")
+_NPM_NAME_RE = re.compile(r"^(?:@[a-z0-9~-][a-z0-9._~-]*/)?[a-z0-9~-][a-z0-9._~-]*$")
+
+# One requirements.txt requirement, once comments, markers and options are cut off:
+# name (with optional [extras]), then an optional specifier. URLs, VCS references
+# and local paths don't match.
+_REQUIREMENT_RE = re.compile(
+    r"^([A-Za-z0-9][A-Za-z0-9_.\-]*(?:\[[^\]]*\])?)\s*(?:(===|==|>=|<=|~=|!=|<|>)(.*))?$"
+)
+
+# Where the requirement part of a line ends: a comment, an environment marker,
+# or per-requirement options such as --hash
+_REQUIREMENT_END_RE = re.compile(r"(?:^|\s)#|;|\s--")
 
 
 class DependencyPlugin (BasePlugin):
@@ -58,6 +95,34 @@ class DependencyPlugin (BasePlugin):
     This modular design ensures we can easily add new methods or sources of vulnerability data later.
     """
 
+    def __init__(self, use_cache: bool = True):
+        # pip-audit / npm audit results keyed by the exact dependency list, kept for AUDIT_CACHE_TTL_SECONDS
+        self.cache = ResultCache("audit") if use_cache else None
+        # Parsed manifests keyed by (path, mtime_ns, size), so rescans skip unchanged files
+        self._parsed: Dict[Tuple[str, int, int], list] = {}
+        # npm scratch project, created on first use and removed at exit
+        self._npm_scratch = None
+        self._npm_lock = threading.Lock()
+        # OSV API client, created on first use
+        self._osv = None
+
+    def _npm_scratch_dir(self) -> str:
+        if self._npm_scratch is None:
+            self._npm_scratch = tempfile.mkdtemp(prefix="reposcan-npm-")
+            atexit.register(shutil.rmtree, self._npm_scratch, ignore_errors=True)
+        return self._npm_scratch
+
+    def _audit_cache_key(self, tool: str, deps: List[Tuple[str, str]]) -> str:
+        return content_digest("\n".join([tool] + [f"{pkg}=={ver}" for pkg, ver in sorted(deps)]).encode("utf-8"))
+
+    def _cached_audit(self, key: str):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key, max_age=AUDIT_CACHE_TTL_SECONDS)
+        if cached is not None:
+            logger.info("Reusing cached audit results for an unchanged dependency list")
+        return cached
+
     def scan(self, target_path: str) -> Dict[str, Any]:
         """
         1. Identify dependencies in repo
@@ -117,22 +182,27 @@ class DependencyPlugin (BasePlugin):
         return findings
 
     def parse_requirements_txt(self, file_path: str) -> list:
-        """Parse requirements.txt file and return list of (package, version) tuples"""
-        deps = []
+        """
+        Parse requirements.txt file and return list of (package, version) tuples.
+        "pkg==1.0" gives ("pkg", "1.0"); any other specifier keeps its operator, e.g. ("pkg", ">=1.0,<2").
+        Lines continued with a trailing backslash are joined first. Comments, environment
+        markers and per-requirement options (--hash, ...) are dropped; option lines (-r, -e,
+        --index-url, ...), URLs, VCS references (git+https://...) and local paths are skipped,
+        since they name no package we could look up.
+        """
         with open(file_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    # Handle different requirement formats
-                    if '==' in line:
-                        pkg, ver = line.split('==')
-                        deps.append((pkg.strip(), ver.strip()))
-                    elif '>=' in line:
-                        pkg, ver = line.split('>=')
-                        deps.append((pkg.strip(), f">={ver.strip()}"))
-                    else:
-                        # Package with no version specified
-                        deps.append((line, ""))
+            text = f.read()
+
+        deps = []
+        for line in re.sub(r"\\\r?\n", " ", text).splitlines():
+            line = _REQUIREMENT_END_RE.split(line, 1)[0].strip()
+            if not line or line.startswith("-"):
+                continue
+            m = _REQUIREMENT_RE.match(line)
+            if m:
+                pkg, op, ver = m.groups()
+                ver = "".join((ver or "").split())  # ">= 1.2, < 2" -> ">=1.2,<2"
+                deps.append((pkg, ver if op == "==" else (op or "") + ver))
         return deps
 
     def parse_pyproject_toml(self, file_path: str) -> list:
@@ -140,7 +210,7 @@ class DependencyPlugin (BasePlugin):
         deps = []
         with open(file_path, 'rb') as f:
             try:
-                data = tomli.load(f)
+                data = tomllib.load(f)
                 # Check project.dependencies
                 project_deps = data.get('project', {}).get('dependencies', [])
                 if project_deps:
@@ -158,7 +228,7 @@ class DependencyPlugin (BasePlugin):
                         if pkg != 'python':  # Skip python version constraint
                             deps.append((pkg, str(ver)))
             except Exception as e:
-                print(f"Error parsing pyproject.toml: {e}")
+                logger.error(f"Error parsing {file_path}: {e}")
         return deps
 
     def parse_package_json(self, file_path: str) -> list:
@@ -174,7 +244,7 @@ class DependencyPlugin (BasePlugin):
                 dev_dependencies = data.get('devDependencies', {})
                 deps.extend((pkg, ver) for pkg, ver in dev_dependencies.items())
             except Exception as e:
-                print(f"Error parsing package.json: {e}")
+                logger.error(f"Error parsing {file_path}: {e}")
         return deps
 
     def identify_repo_dependencies(self, repo_path: str) -> dict:
@@ -195,46 +265,40 @@ class DependencyPlugin (BasePlugin):
             "python": {},
             "node": {}
         }
-        
-        total_deps = 0
-        
-        repo_path = Path(repo_path)
-        
-        # Look for Python dependency files
-        for req_file in repo_path.rglob('requirements.txt'):
-            try:
-                deps = self.parse_requirements_txt(str(req_file))
-                if deps:
-                    rel_path = str(req_file.relative_to(repo_path))
-                    result["python"][rel_path] = deps
-                    logger.info(f"Found requirements.txt at {rel_path} with {len(deps)} dependencies")
-                    total_deps += len(deps)
-            except Exception as e:
-                print(f"Error processing {req_file}: {e}")
-        
-        for pyproject in repo_path.rglob('pyproject.toml'):
+
+        # Manifest file name -> (ecosystem, parser)
+        parsers = {
+            "requirements.txt": ("python", self.parse_requirements_txt),
+            "pyproject.toml": ("python", self.parse_pyproject_toml),
+            "package.json": ("node", self.parse_package_json),
+        }
+
+        # One walk for all manifest types, never descending into vendored or VCS directories
+        manifests = []
+        for root, dirs, files in os.walk(repo_path):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            manifests.extend(os.path.join(root, name) for name in files if name in parsers)
+
+        def parse_manifest(manifest_path):
             try:
-                deps = parse_pyproject_toml(str(pyproject))
-                if deps:
-                    rel_path = str(pyproject.relative_to(repo_path))
-                    result["python"][rel_path] = deps
-                    logger.info(f"Found pyproject.toml at {rel_path} with {len(deps)} dependencies")
-                    total_deps += len(deps)
+                st = os.stat(manifest_path)
+                key = (manifest_path, st.st_mtime_ns, st.st_size)
+                if key not in self._parsed:
+                    self._parsed[key] = parsers[os.path.basename(manifest_path)][1](manifest_path)
+                return list(self._parsed[key])
             except Exception as e:
-                print(f"Error processing {pyproject}: {e}")
-        
-        # Look for Node.js dependency files
-        for pkg_json in repo_path.rglob('package.json'):
-            try:
-                deps = self.parse_package_json(str(pkg_json))
+                logger.error(f"Error processing {manifest_path}: {e}")
+                return []
+
+        # Parsing is mostly file I/O, so a few threads overlap it; map() keeps walk order
+        with ThreadPoolExecutor(max_workers=AUDIT_MAX_WORKERS) as executor:
+            for manifest_path, deps in zip(manifests, executor.map(parse_manifest, manifests)):
                 if deps:
-                    rel_path = str(pkg_json.relative_to(repo_path))
-                    result["node"][rel_path] = deps
-                    logger.info(f"Found package.json at {rel_path} with {len(deps)} dependencies")
-                    total_deps += len(deps)
-            except Exception as e:
-                print(f"Error processing {pkg_json}: {e}")
-        
+                    name = os.path.basename(manifest_path)
+                    rel_path = os.path.relpath(manifest_path, repo_path)
+                    result[parsers[name][0]][rel_path] = deps
+                    logger.info(f"Found {name} at {rel_path} with {len(deps)} dependencies")
+
         return result
 
 
@@ -243,11 +307,18 @@ class DependencyPlugin (BasePlugin):
         if not deps:
             logger.info("pip-audit requested with no dependencies to check. skipping.")
             return []
+
+        cache_key = self._audit_cache_key("pip-audit", deps)
+        cached = self._cached_audit(cache_key)
+        if cached is not None:
+            return cached
         
         # Create a temporary requirements.txt
         with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as tmp:
             for pkg, ver in deps:
-                if ver:
+                if ver and ver[0] in "<>=!~":
+                    tmp.write(f"{pkg}{ver}\n")  # Already a specifier, e.g. ">=1.0"
+                elif ver:
                     tmp.write(f"{pkg}=={ver}\n")
                 else:
                     tmp.write(f"{pkg}\n")
@@ -257,43 +328,49 @@ class DependencyPlugin (BasePlugin):
         try:
             logger.info(f"Attempting pip-audit on {len(deps)} dependencies")
             cmd = ['pip-audit', '--requirement', tmp_path, '--format', 'json']
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            # Parse JSON output regardless of return code
-            try:
-                audit_data = json.loads(result.stdout)
-                for dep in audit_data.get('dependencies', []):
-                    vulns = dep.get('vulns', [])
-                    if vulns:
+            # stdout is parsed as it streams in; stderr goes to a file so a full pipe can't stall pip-audit
+            with tempfile.TemporaryFile() as stderr_file, \
+                    subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file) as proc:
+                # Parse JSON output regardless of return code
+                try:
+                    for dep in fast_json.iter_array(proc.stdout, 'dependencies'):
+                        vulns = dep.get('vulns', [])
+                        if vulns:
+                            findings.append({
+                                "package": dep.get('name'),
+                                "version": dep.get('version'),
+                                "vulnerabilities": [{
+                                    "id": v.get('id'),
+                                    "description": v.get('description'),
+                                    "severity": "high"  # pip-audit doesn't provide severity
+                                } for v in vulns]
+                            })
+                    if self.cache is not None:
+                        self.cache.set(cache_key, findings)
+                except fast_json.JSONDecodeError:
+                    findings = []
+                    proc.wait()
+                    stderr_file.seek(0)
+                    stderr = stderr_file.read().decode("utf-8", errors="replace")
+                    if "ResolutionImpossible" in stderr:
+                        logger.error("pip-audit failed due to dependency conflicts")
                         findings.append({
-                            "package": dep.get('name'),
-                            "version": dep.get('version'),
+                            "package": "requirements",
+                            "version": "N/A", 
                             "vulnerabilities": [{
-                                "id": v.get('id'),
-                                "description": v.get('description'),
-                                "severity": "high"  # pip-audit doesn't provide severity
-                            } for v in vulns]
+                                "id": "DEPENDENCY_CONFLICT",
+                                "description": "Conflicting dependencies detected. This could mask security issues.",
+                                "severity": "medium"
+                            }]
                         })
-            except json.JSONDecodeError:
-                if "ResolutionImpossible" in result.stderr:
-                    logger.error("pip-audit failed due to dependency conflicts")
-                    findings.append({
-                        "package": "requirements",
-                        "version": "N/A", 
-                        "vulnerabilities": [{
-                            "id": "DEPENDENCY_CONFLICT",
-                            "description": "Conflicting dependencies detected. This could mask security issues.",
-                            "severity": "medium"
-                        }]
-                    })
-                else:
-                    logger.error(f"pip-audit failed: {result.stderr}")
+                    else:
+                        logger.error(f"pip-audit failed: {stderr}")
                         
             if findings:
                 logger.info(f"Found {len(findings)} dependency issues")
             return findings
                 
-        except subprocess.CalledProcessError as e:
+        except OSError as e:
             logger.error(f"Error running dependency check: {str(e)}")
             return findings
         finally:
@@ -303,6 +380,11 @@ class DependencyPlugin (BasePlugin):
         """Run npm audit on the given dependencies and return findings"""
         if not deps:
             return []
+
+        cache_key = self._audit_cache_key("npm-audit", deps)
+        cached = self._cached_audit(cache_key)
+        if cached is not None:
+            return cached
         
         # Create a temporary package.json
         package_json = {
@@ -313,66 +395,170 @@ class DependencyPlugin (BasePlugin):
             }
         }
         
-        with tempfile.TemporaryDirectory() as tmp_dir:
+        # One scratch project per plugin, reused across runs (serialised, since runs share it)
+        with self._npm_lock:
+            tmp_dir = self._npm_scratch_dir()
             pkg_path = os.path.join(tmp_dir, 'package.json')
             with open(pkg_path, 'w') as f:
                 json.dump(package_json, f)
             
             try:
-                # Run npm install and npm audit
-                subprocess.run(['npm', 'install', '--prefix', tmp_dir], 
+                # Resolve the lockfile only: npm audit needs the dependency tree, not the packages
+                subprocess.run(['npm', 'install', '--package-lock-only', '--no-audit', '--prefix', tmp_dir],
                              capture_output=True, check=True)
-                result = subprocess.run(['npm', 'audit', '--json', '--prefix', tmp_dir],
-                                     capture_output=True, text=True)
-                
-                try:
-                    audit_data = json.loads(result.stdout)
-                    vulnerabilities = []
-                    
-                    for adv in audit_data.get('advisories', {}).values():
-                        vulnerabilities.append({
-                            "package": adv.get('module_name'),
-                            "version": adv.get('findings', [{}])[0].get('version'),
-                            "vulnerabilities": [{
-                                "id": adv.get('github_advisory_id') or adv.get('cve'),
-                                "description": adv.get('overview'),
-                                "severity": adv.get('severity')
-                            }]
-                        })
-                    if vulnerabilities:
-                        logger.info(f"npm audit found {len(vulnerabilities)} vulnerable packages")
-                    return vulnerabilities
-                except json.JSONDecodeError:
-                    return []
+                with subprocess.Popen(['npm', 'audit', '--json', '--prefix', tmp_dir],
+                                      stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+                    try:
+                        # Advisories are parsed one at a time as npm writes them
+                        vulnerabilities = []
+                        for adv in fast_json.iter_object_values(proc.stdout, 'advisories'):
+                            vulnerabilities.append({
+                                "package": adv.get('module_name'),
+                                "version": adv.get('findings', [{}])[0].get('version'),
+                                "vulnerabilities": [{
+                                    "id": adv.get('github_advisory_id') or adv.get('cve'),
+                                    "description": adv.get('overview'),
+                                    "severity": adv.get('severity')
+                                }]
+                            })
+                        if vulnerabilities:
+                            logger.info(f"npm audit found {len(vulnerabilities)} vulnerable packages")
+                        if self.cache is not None:
+                            self.cache.set(cache_key, vulnerabilities)
+                        return vulnerabilities
+                    except fast_json.JSONDecodeError:
+                        return []
                     
-            except subprocess.CalledProcessError:
+            except (OSError, subprocess.CalledProcessError):
                 return []
 
+    def _merge_for_audit(self, deps_by_file: Dict[str, List[Tuple[str, str]]], normalize) -> Tuple[List[List[Tuple[str, str]]], Dict[str, List[str]]]:
+        """
+        Merge the dependencies of several manifests so one audit run covers them all.
+
+        Returns (groups, sources):
+        - groups: lists of (pkg, version) to audit, one run each. Usually a single group;
+          a package pinned to different versions in different manifests gets one extra
+          group per extra version, so no run has to resolve conflicting pins.
+        - sources: normalized package name (without [extras]) -> manifests that declare it,
+          for reporting.
+        """
+        groups: List[Dict[str, Tuple[str, str]]] = []
+        sources: Dict[str, List[str]] = {}
+        for manifest, file_deps in deps_by_file.items():
+            for pkg, ver in file_deps:
+                name = normalize(pkg)
+                # Findings name the bare package, whichever extras the manifest asked for
+                manifests = sources.setdefault(normalize(pkg.split("[", 1)[0]), [])
+                if manifest not in manifests:
+                    manifests.append(manifest)
+                for group in groups:
+                    if name not in group:
+                        group[name] = (pkg, ver)
+                        break
+                    if group[name][1] == ver:
+                        break  # Same pin already queued
+                else:
+                    groups.append({name: (pkg, ver)})
+        return [list(group.values()) for group in groups], sources
+
+    def _audit_group(self, deps: List[Tuple[str, str]], osv_ecosystem: str, run_audit) -> List[dict]:
+        """
+        Findings for one merged dependency list: OSV for exact pins, `run_audit` (pip-audit /
+        npm audit) for version ranges, unpinned packages and names OSV can't be asked about,
+        or for everything if OSV is unreachable.
+        """
+        pinned, rest = [], []
+        for pkg, ver in deps:
+            osv_name = _osv_package_name(pkg, osv_ecosystem) if _is_exact_version(ver, osv_ecosystem) else None
+            if osv_name is None:
+                rest.append((pkg, ver))
+            else:
+                pinned.append((osv_name, ver))
+
+        findings = []
+        if pinned:
+            osv_findings = self._query_osv(pinned, osv_ecosystem)
+            if osv_findings is None:
+                rest = deps
+            else:
+                findings.extend(osv_findings)
+        if rest:
+            findings.extend(run_audit(rest))
+        return findings
+
+    def _query_osv(self, deps: List[Tuple[str, str]], osv_ecosystem: str):
+        # OSVClient caches per (ecosystem, name, version), so no list-level cache here
+        if self._osv is None:
+            # Imported here: it pulls in requests, which local scans without pinned dependencies never need
+            from src.utils.osv import OSVClient
+            self._osv = OSVClient(use_cache=self.cache is not None)
+        logger.info(f"Checking {len(deps)} pinned {osv_ecosystem} dependencies against OSV")
+        return self._osv.query(deps, osv_ecosystem)
+
     def run_repo_vulnerability_checks(self, dependencies: dict) -> dict:
         """
         Given a dict of dependencies, run external tools or query APIs to find known vulnerabilities.
+        Exactly pinned dependencies are looked up in OSV directly; the rest go to pip-audit /
+        npm audit. All manifests of an ecosystem are merged into one audit run (both tools
+        resolve the full dependency graph per run, which is the slow part), and the runs
+        themselves go in parallel since they mostly wait on subprocesses and network.
+        Each issue gets a "manifests" list naming the files that declare the package.
         """
         findings = {
             "dependency_issues": [],
             "total_vulnerabilities": 0,
-            "vulnerable_packages": set()
+            "vulnerable_packages": []
         }
-        
-        # Check Python dependencies
-        for file_deps in dependencies.get("python", {}).values():
-            python_vulns = self._run_pip_audit(file_deps)
-            findings["dependency_issues"].extend(python_vulns)
-            findings["total_vulnerabilities"] += sum(len(v.get("vulnerabilities", [])) for v in python_vulns)
-            findings["vulnerable_packages"].update(v.get("package") for v in python_vulns)
-        
-        # Check Node.js dependencies
-        for file_deps in dependencies.get("node", {}).values():
-            node_vulns = self._run_npm_audit(file_deps)
-            findings["dependency_issues"].extend(node_vulns)
-            findings["total_vulnerabilities"] += sum(len(v.get("vulnerabilities", [])) for v in node_vulns)
-            findings["vulnerable_packages"].update(v.get("package") for v in node_vulns)
-        
-        # Convert set to list for JSON serialization
-        findings["vulnerable_packages"] = list(findings["vulnerable_packages"])
-        
+        vulnerable_packages = {}  # Used as an insertion-ordered set
+
+        ecosystems = [
+            ("python", "PyPI", self._run_pip_audit, _normalize_python_name),
+            ("node", "npm", self._run_npm_audit, str),
+        ]
+        with ThreadPoolExecutor(max_workers=AUDIT_MAX_WORKERS) as executor:
+            jobs = []
+            for ecosystem, osv_ecosystem, run_audit, normalize in ecosystems:
+                groups, sources = self._merge_for_audit(dependencies.get(ecosystem, {}), normalize)
+                jobs.extend(
+                    (executor.submit(self._audit_group, group, osv_ecosystem, run_audit), sources, normalize)
+                    for group in groups
+                )
+
+            # Collected in submission order, so the report order doesn't depend on timing
+            for future, sources, normalize in jobs:
+                for issue in future.result():
+                    issue["manifests"] = sources.get(normalize(issue.get("package") or ""), [])
+                    findings["dependency_issues"].append(issue)
+                    findings["total_vulnerabilities"] += len(issue.get("vulnerabilities", []))
+                    vulnerable_packages[issue.get("package")] = None
+
+        # The report expects a JSON array, in first-seen order
+        findings["vulnerable_packages"] = list(vulnerable_packages)
+
         return findings
+
+
+def _is_exact_version(version: str, osv_ecosystem: str) -> bool:
+    """ Whether `version` names a single release (OSV can only be asked about those), not a range. """
+    if osv_ecosystem == "npm":
+        return bool(_NPM_EXACT_VERSION_RE.match(version))
+    # Python pins are stored without their "==" (see parse_requirements_txt)
+    return bool(_PYTHON_EXACT_VERSION_RE.match(version))
+
+
+def _osv_package_name(pkg: str, osv_ecosystem: str) -> Optional[str]:
+    """
+    The name OSV indexes `pkg` under, or None if it isn't a plain package name.
+    OSV answers an unknown name with "no vulnerabilities", so anything it can't
+    match ("requests[security]" as is, a URL, ...) must go to the audit tools instead.
+    """
+    if osv_ecosystem == "npm":
+        return pkg if _NPM_NAME_RE.match(pkg) else None
+    name = pkg.split("[", 1)[0].strip()  # "requests[security]" -> "requests"
+    return _normalize_python_name(name) if _PYTHON_NAME_RE.match(name) else None
+
+
+def _normalize_python_name(name: str) -> str:
+    """ PEP 503 normalized project name, so "Foo_Bar" in one manifest and "foo-bar" in another match. """
+    return _NAME_SEPARATORS_RE.sub("-", name).lower()
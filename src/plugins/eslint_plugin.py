@@ -1,17 +1,26 @@
 import os
+import asyncio
 import subprocess
-import json
+from src.utils import fast_json
+from src.utils.cache import content_digest
+from src.utils.config import CACHE_DIR, JS_EXTENSIONS, SKIP_DIRS
 from src.utils.logger import logger
-from typing import Dict, Any
+from src.utils.subprocess_runner import CommandResult, run_commands
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
 from src.plugins.base_plugin import BasePlugin
 
+# Number of files passed to one ESLint process
+ESLINT_BATCH_SIZE = 256
+
 class ESLintPlugin(BasePlugin):
     """
     ESLint-based scanner for JavaScript/TypeScript files.
 
     This module:
     - Checks if ESLint is installed.
-    - If installed, runs ESLint on the given JS/TS file.
+    - If installed, runs ESLint over the JS/TS files in the target, in batches
+      that run concurrently (up to one per CPU).
     - Parses the JSON output and flags any reported issues as suspicious findings.
 
     This isn't a perfect malicious code detector, but a stepping stone
@@ -19,115 +28,164 @@ class ESLintPlugin(BasePlugin):
     or rules for malicious detection.
     """
 
+    def __init__(self, use_cache: bool = True):
+        # ESLint keeps its own per-file result cache; we only choose where it lives
+        self.use_cache = use_cache
+
     def scan(self, target_path: str):
         """
 
         Returns a dict of findings in the same format as other scanners:
         {
           "eslint_issues": [ 
-            { "line": number, "rule": "rule-id", "message": "some message" },
+            { "file": "/path/to/file.js", "line": number, "rule": "rule-id", "message": "some message", "severity": "error" },
             ...
           ]
         }
 
+        All JS/TS files are linted by a handful of batched ESLint invocations
+        (ESLINT_BATCH_SIZE files each) rather than one Node.js startup per file.
+
         If no issues or eslint not installed, returns empty dict.
         """
-        findings = {}
-        
         if not self.is_eslint_installed():
             logger.info("ESLint not installed, skipping ESLint scan.")
             return {}
 
+        return asyncio.run(self._scan_async(target_path))
+
+    async def _scan_async(self, target_path: str) -> Dict[str, Any]:
+        """
+        Collect the JS/TS files under `target_path` and lint them in concurrent batches.
+        Output is only parsed once every ESLint process has finished.
+        """
+        findings = {}
+
         # 1. If target_path is a directory, gather all the relevant files
         file_list = []
         if os.path.isdir(target_path):
             for root, dirs, files in os.walk(target_path):
+                # Vendored and VCS directories are never linted (--no-ignore below would include them)
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
                 for f in files:
-                    # Optional: filter by extension if desired
-                    file_list.append(os.path.join(root, f))
+                    if f.endswith(JS_EXTENSIONS):
+                        file_list.append(os.path.join(root, f))
         elif os.path.isfile(target_path):
             file_list = [target_path]
         else:
             logger.error(f"ESLintPlugin: '{target_path}' is neither file nor directory?")
             return findings
-        
-        # 2. Now iterate over the collected files
-        for file_path in file_list:
-
-            try:
-                # Run ESLint with JSON formatter
-                # --no-ignore ensures it checks even files that might be ignored by default ESLint configs
-                result = subprocess.run(
-                    ["eslint", "--no-ignore", "--format", "json", file_path],
-                    capture_output=True,
-                    text=True
-                )
-
-                if result.returncode not in [0,1]: 
-                    # ESLint returns 0 if no problems, 1 if problems found
-                    # Any other return code might be an error
-                    logger.warning(f"ESLint returned code {result.returncode}. Stdout: {result.stdout}, Stderr: {result.stderr}")
-                    return {}
-
-                # Parse JSON output
-                try:
-                    eslint_output = json.loads(result.stdout)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error parsing ESLint output JSON: {e}")
-                    return {}
-
-                # ESLint output is a list of results, each with .messages
-                # Example structure:
-                # [
-                #   {
-                #     "filePath": "/path/to/file.js",
-                #     "messages": [
-                #       {
-                #         "ruleId": "no-eval",
-                #         "severity": 2,
-                #         "message": "eval is evil.",
-                #         "line": 10,
-                #         "column": 5,
-                #         "nodeType": "CallExpression",
-                #         "endLine": 10,
-                #         "endColumn": 9
-                #       }
-                #     ]
-                #   }
-                # ]
-
-                if not eslint_output:
-                    return {}
-
-                file_result = eslint_output[0] if len(eslint_output) > 0 else None
-                if not file_result or "messages" not in file_result:
-                    return {}
-
-                findings = {}
-                eslint_issues = []
-                for msg in file_result["messages"]:
-                    # severity: 1=warning, 2=error
-                    eslint_issues.append({
-                        "line": msg.get("line"),
-                        "rule": msg.get("ruleId"),
-                        "message": msg.get("message"),
-                        "severity": "error" if msg.get("severity") == 2 else "warning"
-                    })
-
-                if eslint_issues:
-                    findings["eslint_issues"] = eslint_issues
-
-                return findings
-            except Exception as e:
-                logger.error(f"Error running ESLint on {file_path}: {e}")
-                return {}
+
+        # 2. Lint the collected files in batches, keeping each command line well under ARG_MAX
+        batches = [file_list[start:start + ESLINT_BATCH_SIZE] for start in range(0, len(file_list), ESLINT_BATCH_SIZE)]
+        # --no-ignore ensures it checks even files that might be ignored by default ESLint configs
+        cmds = [["eslint", "--no-ignore", "--format", "json", *self._cache_args(target_path, idx), *batch]
+                for idx, batch in enumerate(batches)]
+        results = await run_commands(cmds)
+
+        eslint_issues = []
+        for batch, result in zip(batches, results):
+            eslint_issues.extend(self._parse_eslint_result(batch, result))
+
+        if eslint_issues:
+            findings["eslint_issues"] = eslint_issues
+
+        return findings
+
+    def _parse_eslint_result(self, file_paths: List[str], result: CommandResult) -> List[Dict[str, Any]]:
+        """
+        Parse the output of one ESLint process over `file_paths` and return the
+        issues for all of them, each tagged with the file it belongs to.
+        """
+        if result.returncode is None:
+            logger.error(f"Error running ESLint on a batch of {len(file_paths)} files: {result.stderr}")
+            return []
+
+        if result.returncode not in [0,1]: 
+            # ESLint returns 0 if no problems, 1 if problems found
+            # Any other return code might be an error
+            logger.warning(f"ESLint returned code {result.returncode}. Stdout: {result.stdout.decode('utf-8', errors='replace')}, Stderr: {result.stderr}")
+            return []
+
+        # Parse JSON output
+        try:
+            eslint_output = fast_json.loads(result.stdout)
+        except fast_json.JSONDecodeError as e:
+            logger.error(f"Error parsing ESLint output JSON: {e}")
+            return []
+
+        # ESLint output is a list of results, one per linted file, each with .messages
+        # Example structure:
+        # [
+        #   {
+        #     "filePath": "/path/to/file.js",
+        #     "messages": [
+        #       {
+        #         "ruleId": "no-eval",
+        #         "severity": 2,
+        #         "message": "eval is evil.",
+        #         "line": 10,
+        #         "column": 5,
+        #         "nodeType": "CallExpression",
+        #         "endLine": 10,
+        #         "endColumn": 9
+        #       }
+        #     ]
+        #   }
+        # ]
+
+        eslint_issues = []
+        for file_result in eslint_output or []:
+            for msg in file_result.get("messages", []):
+                # severity: 1=warning, 2=error
+                eslint_issues.append({
+                    "file": file_result.get("filePath"),
+                    "line": msg.get("line"),
+                    "rule": msg.get("ruleId"),
+                    "message": msg.get("message"),
+                    "severity": "error" if msg.get("severity") == 2 else "warning"
+                })
+
+        return eslint_issues
+
+    def _cache_args(self, target_path: str, batch_index: int) -> List[str]:
+        """
+        ESLint --cache flags for one batch, or none if caching is off. Each batch gets
+        its own cache file, since concurrent ESLint processes would overwrite a shared
+        one; walk order is stable, so an unchanged tree maps the same files to each.
+        The content strategy keeps entries valid across checkouts that reset mtimes.
+        ESLint keys entries by absolute path, so this only pays off for a tree scanned
+        in place; callers should pass use_cache=False for a temporary copy.
+        """
+        if not self.use_cache:
+            return []
+        target_key = content_digest(os.path.realpath(target_path).encode("utf-8", "surrogateescape"))
+        cache_dir = os.path.join(CACHE_DIR, "eslint", target_key)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            logger.debug(f"Could not create ESLint cache directory {cache_dir}: {e}")
+            return []
+        cache_file = os.path.join(cache_dir, f"batch-{batch_index}.eslintcache")
+        return ["--cache", "--cache-strategy", "content", "--cache-location", cache_file]
 
     def is_eslint_installed(self):
         """ Check if ESLint is available on the system PATH. """
-        try:
-            result = subprocess.run(["eslint", "--version"], capture_output=True, text=True, check=True)
-            logger.debug(f"ESLint version: {result.stdout.strip()}")
-            return True
-        except (OSError, subprocess.CalledProcessError):
-            logger.debug("ESLint not available or not working properly.")
-            return False
+        return eslint_version() is not None
+
+
+@lru_cache(maxsize=1)
+def eslint_version() -> Optional[str]:
+    """
+    `eslint --version` output, or None if ESLint isn't available.
+    Probed once per process, since starting Node.js for it takes a noticeable moment;
+    call eslint_version.cache_clear() to probe again.
+    """
+    try:
+        result = subprocess.run(["eslint", "--version"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        logger.debug("ESLint not available or not working properly.")
+        return None
+    version = result.stdout.strip()
+    logger.debug(f"ESLint version: {version}")
+    return version
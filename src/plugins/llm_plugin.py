@@ -5,6 +5,7 @@ LLM-based code analysis plugin that uses language models to detect potential iss
 import os
 from typing import Dict, Any
 from src.plugins.base_plugin import BasePlugin
+from src.utils.config import BINARY_SNIFF_BYTES, FILE_EXTENSIONS_TO_SCAN, LLM_MAX_FILE_BYTES, SKIP_DIRS
 from src.utils.logger import logger
 
 class LLMPlugin(BasePlugin):
@@ -13,21 +14,23 @@ class LLMPlugin(BasePlugin):
     
     This plugin:
     - Lazy loads the LiteLLM library
-    - Processes files individually through LLM analysis
+    - Only sends source files (FILE_EXTENSIONS_TO_SCAN) up to LLM_MAX_FILE_BYTES, never binaries
+    - Processes files through LLM analysis, several small files per prompt, several prompts at once
     - Aggregates findings into a standardized format
     """
 
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self._llm = None  # Lazy load LiteLLM
         self._analyzer = None  # Will hold reference to LLM analyzer
+        self.use_cache = use_cache  # Reuse earlier LLM answers for identical code
 
     def _ensure_llm_loaded(self):
         """Lazy load LiteLLM and analyzer only when needed"""
-        if self._llm is None:
+        if self._analyzer is None:
             try:
                 # Lazy import to avoid loading unless needed
                 from src.llm.llm_analyzer import LLMAnalyzer
-                self._analyzer = LLMAnalyzer()
+                self._analyzer = LLMAnalyzer(use_cache=self.use_cache)
             except ImportError as e:
                 logger.error(f"Failed to import LLM dependencies: {e}")
                 raise
@@ -43,9 +46,10 @@ class LLMPlugin(BasePlugin):
         file_list = []
         if os.path.isdir(target_path):
             for root, dirs, files in os.walk(target_path):
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
                 for f in files:
-                    # TODO: Add file extension filtering if needed
-                    file_list.append(os.path.join(root, f))
+                    if f.endswith(FILE_EXTENSIONS_TO_SCAN):
+                        file_list.append(os.path.join(root, f))
         elif os.path.isfile(target_path):
             file_list = [target_path]
         else:
@@ -63,20 +67,35 @@ class LLMPlugin(BasePlugin):
         #    Give user option to proceed or skip the plugin before proceeding. 
         #    Maybe one day options to change model or abort full run, but save for future dev
 
-        # 4. Process each file individually
+        # 4. Read the files, then let the analyzer batch small ones into shared prompts
+        contents = []
         for file_path in file_list:
             try:
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                    
-                    # Process through LLM analyzer
-                    file_findings = self._analyzer.analyze_code(content)
-                    
-                    if file_findings:
-                        findings[file_path] = file_findings
-                        
+                content = self._read_source(file_path)
             except Exception as e:
                 logger.error(f"Error processing file {file_path}: {e}")
                 findings.setdefault(file_path, {})["error_processing"] = str(e)
+                continue
+            if content is not None:
+                contents.append((file_path, content))
+
+        for file_path, file_findings in self._analyzer.analyze_batch(contents).items():
+            if file_findings:
+                findings[file_path] = file_findings
 
         return findings
+
+    @staticmethod
+    def _read_source(file_path: str):
+        """ Text of `file_path`, or None if it is too large for the LLM or looks binary. """
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > LLM_MAX_FILE_BYTES:
+                logger.debug("LLMPlugin: skipping %s, larger than %d bytes", file_path, LLM_MAX_FILE_BYTES)
+                return None
+            # Sniff the head before reading the rest, so binaries are never loaded whole
+            head = f.read(BINARY_SNIFF_BYTES)
+            if b"\x00" in head:
+                logger.debug("LLMPlugin: skipping binary file %s", file_path)
+                return None
+            data = head + f.read()
+        return data.decode("utf-8", errors="ignore")
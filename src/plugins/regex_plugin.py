@@ -3,78 +3,574 @@ Basic example to demonstrate using a plugin. Use more robust detectors for actua
 
 """
 
+import logging
+import mmap
 import os
-from typing import Dict, Any
+import re
+import stat
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache, partial
+from itertools import chain, islice
+from types import MappingProxyType
+from typing import Dict, Any, Callable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
 from src.patterns.common_patterns import SUSPICIOUS_PATTERNS as COMMON_PATTERNS
-from src.patterns.python_patterns import PYTHON_SUSPICIOUS_PATTERNS
-from src.patterns.javascript_patterns import JAVASCRIPT_SUSPICIOUS_PATTERNS
-from src.plugins.base_plugin import BasePlugin 
+from src.patterns.common_patterns import PATTERN_LITERALS as COMMON_PATTERN_LITERALS
+from src.patterns.common_patterns import SUSPICIOUS_PATTERNS_BYTES as COMMON_PATTERNS_BYTES
+from src.patterns.python_patterns import PYTHON_SUSPICIOUS_PATTERNS, PYTHON_SUSPICIOUS_PATTERNS_BYTES
+from src.patterns.python_patterns import PYTHON_PATTERN_LITERALS
+from src.patterns.javascript_patterns import JAVASCRIPT_SUSPICIOUS_PATTERNS, JAVASCRIPT_SUSPICIOUS_PATTERNS_BYTES
+from src.patterns.javascript_patterns import JAVASCRIPT_PATTERN_LITERALS
+from src.patterns.engine import PresenceFilter, RipgrepError, linear_findall, ripgrep_matches
+from src.plugins.base_plugin import BasePlugin
+from src.utils.cache import ResultCache, content_digest
+from src.utils.config import BINARY_EXTENSIONS, BINARY_SNIFF_BYTES, JS_EXTENSIONS, MAX_SCAN_BYTES, SKIP_DIRS
 from src.utils.logger import logger
 
+try:
+    # Python 3.11+; the sre_* modules are deprecated aliases there
+    from re import _parser as sre_parse
+    from re._constants import ASSERT, ASSERT_NOT, AT, BRANCH, MAX_REPEAT, MAXREPEAT, MIN_REPEAT, SUBPATTERN
+except ImportError:
+    import sre_parse
+    from sre_constants import ASSERT, ASSERT_NOT, AT, BRANCH, MAX_REPEAT, MAXREPEAT, MIN_REPEAT, SUBPATTERN
+
+try:
+    import ahocorasick_rs
+except ImportError:
+    # Optional accelerator; fall back to one substring check per literal.
+    ahocorasick_rs = None
+
+
+def _check_precompiled(*pattern_dicts: dict) -> None:
+    """
+    Pattern modules must hold compiled regexes, never strings, so nothing is
+    compiled per file. Fail loudly at import if a contribution regresses this.
+    """
+    for pattern_dict in pattern_dicts:
+        for name, regex in pattern_dict.items():
+            if not isinstance(regex, re.Pattern):
+                raise TypeError(f"Pattern '{name}' must be precompiled with re.compile(), got {type(regex).__name__}")
+
+
+def _check_unique_names(*pattern_dicts: dict) -> None:
+    """
+    Pattern names double as group names in the fused regex and as finding keys,
+    so they must be unique across all pattern modules.
+    """
+    seen = set()
+    for pattern_dict in pattern_dicts:
+        for name in pattern_dict:
+            if name in seen:
+                raise ValueError(f"Pattern name '{name}' is defined in more than one pattern module")
+            seen.add(name)
+
+
+def _is_nullable(items) -> bool:
+    """ True if every element of a parsed regex sequence can match the empty string. """
+    for op, arg in items:
+        if op in (MAX_REPEAT, MIN_REPEAT):
+            if arg[0] > 0 and not _is_nullable(arg[2]):
+                return False
+        elif op is SUBPATTERN:
+            if not _is_nullable(arg[3]):
+                return False
+        elif op is BRANCH:
+            if not any(_is_nullable(alt) for alt in arg[1]):
+                return False
+        elif op not in (AT, ASSERT, ASSERT_NOT):
+            return False
+    return True
+
+
+def _is_unbounded_repeat_with_optional_rest(items) -> bool:
+    """
+    True if a parsed regex sequence is, in effect, one unbounded repeat plus parts
+    that may match nothing (a+, (a+), \\w+\\s*, b|c+ ...). Repeating such a sequence
+    again gives exponentially many ways to split the same input between iterations.
+    """
+    for idx, (op, arg) in enumerate(items):
+        if op in (MAX_REPEAT, MIN_REPEAT):
+            repeating = arg[1] == MAXREPEAT
+        elif op is SUBPATTERN:
+            repeating = _is_unbounded_repeat_with_optional_rest(arg[3])
+        elif op is BRANCH:
+            repeating = any(_is_unbounded_repeat_with_optional_rest(alt) for alt in arg[1])
+        else:
+            repeating = False
+        if repeating and _is_nullable(items[:idx]) and _is_nullable(items[idx + 1:]):
+            return True
+    return False
+
+
+def _find_ambiguous_repeat(items) -> bool:
+    """ True if a parsed regex repeats, without bound, a sequence that _is_unbounded_repeat_with_optional_rest(). """
+    for op, arg in items:
+        if op in (MAX_REPEAT, MIN_REPEAT):
+            if arg[1] == MAXREPEAT and _is_unbounded_repeat_with_optional_rest(arg[2]):
+                return True
+        # Groups, branches, lookarounds, ...: search every sub-pattern they hold
+        for sub in arg if isinstance(arg, (list, tuple)) else (arg,):
+            subs = sub if isinstance(sub, list) else (sub,)
+            if any(isinstance(s, sre_parse.SubPattern) and _find_ambiguous_repeat(s) for s in subs):
+                return True
+    return False
+
+
+def _check_no_catastrophic_backtracking(*pattern_dicts: dict) -> None:
+    """
+    The Hyperscan/RE2 prefilter only decides whether a pattern runs; findall() is
+    always Python's backtracking re. A repeat nested directly in another, like (a+)+
+    or (?:\\w+\\s*)*, can take exponential time on a crafted file, so reject that
+    shape at import. Anchor each iteration on something required, as in
+    [a-z]+(?:\\.[a-z]+)*, or bound the inner repeat.
+    """
+    for pattern_dict in pattern_dicts:
+        for name, regex in pattern_dict.items():
+            if _find_ambiguous_repeat(sre_parse.parse(regex.pattern, regex.flags)):
+                raise ValueError(f"Pattern '{name}' nests unbounded repeats, which can backtrack catastrophically")
+
+
+_check_precompiled(COMMON_PATTERNS, PYTHON_SUSPICIOUS_PATTERNS, JAVASCRIPT_SUSPICIOUS_PATTERNS)
+_check_unique_names(COMMON_PATTERNS, PYTHON_SUSPICIOUS_PATTERNS, JAVASCRIPT_SUSPICIOUS_PATTERNS)
+_check_no_catastrophic_backtracking(COMMON_PATTERNS, PYTHON_SUSPICIOUS_PATTERNS, JAVASCRIPT_SUSPICIOUS_PATTERNS)
+
+# Required literals per pattern name, across all pattern modules
+ALL_PATTERN_LITERALS = {**COMMON_PATTERN_LITERALS, **PYTHON_PATTERN_LITERALS, **JAVASCRIPT_PATTERN_LITERALS}
+
+# Build a single Aho-Corasick automaton over every literal at import time, so one
+# pass over a file tells us which literals (and therefore which patterns) are in play.
+_LITERALS = sorted({lit for lits in ALL_PATTERN_LITERALS.values() for lit in lits})
+_LITERALS_BYTES = [lit.encode("utf-8") for lit in _LITERALS]
+_LITERAL_MATCHER = ahocorasick_rs.AhoCorasick(_LITERALS) if ahocorasick_rs else None
+_LITERAL_MATCHER_BYTES = ahocorasick_rs.BytesAhoCorasick(_LITERALS_BYTES) if ahocorasick_rs else None
+
+# Hyperscan/RE2 automaton over every pattern (inactive if neither is installed),
+# telling us in one linear-time pass which patterns match a file at all
+_ALL_PATTERNS_BYTES = {**COMMON_PATTERNS_BYTES, **PYTHON_SUSPICIOUS_PATTERNS_BYTES, **JAVASCRIPT_SUSPICIOUS_PATTERNS_BYTES}
+_PRESENCE_FILTER = PresenceFilter(_ALL_PATTERNS_BYTES)
+
+# Bump whenever matching logic changes in a way that alters findings, to invalidate cached results
+SCAN_RESULTS_VERSION = 1
+
+# Content at least this large is matched with RE2 rather than re, where RE2 can
+# express the pattern. Backtracking can get super-linear on big inputs (crafted or
+# not), and from about this size RE2 is faster anyway; below it, re's lower
+# per-call overhead wins.
+LINEAR_MATCH_MIN_BYTES = 4 * 1024
+
+# Files at least this large are mmapped instead of read into memory.
+# Below it, mmap setup costs more than the copy it saves.
+MMAP_MIN_BYTES = 64 * 1024
+
+# Below this many files the process pool startup costs more than it saves
+PARALLEL_SCAN_MIN_FILES = 64
+
+# Files per task sent to a worker, and how many tasks per worker may be queued at once
+SCAN_BATCH_SIZE = 16
+SCAN_IN_FLIGHT_PER_WORKER = 8
+
+
+def find_present_literals(content) -> set:
+    """
+    Return the set of known pattern literals that occur somewhere in `content`,
+    which may be a str or a bytes-like object (bytes, mmap).
+    """
+    if isinstance(content, str):
+        matcher, literals = _LITERAL_MATCHER, _LITERALS
+    else:
+        matcher, literals = _LITERAL_MATCHER_BYTES, _LITERALS_BYTES
+    if matcher is not None:
+        matches = matcher.find_matches_as_indexes(content, overlapping=True)
+        return {_LITERALS[idx] for idx, _, _ in matches}
+    # .find() rather than `in`, which mmap only supports for single bytes
+    return {_LITERALS[idx] for idx, lit in enumerate(literals) if content.find(lit) != -1}
+
+
+def get_patterns_for_file(file_path: str, as_bytes: bool = False) -> Mapping[str, "re.Pattern"]:
+    """
+    Determine which patterns to apply based on the file extension.
+    
+    - Always include common patterns.
+    - If file ends with .py, also include Python-specific patterns.
+    - If file ends with .js, .jsx, .ts, .tsx, include JS patterns.
+    - Other languages: Just common patterns for now.
+
+    With as_bytes=True the bytes-compiled versions are returned, for matching mmapped files.
+    The mapping is shared between all files with the same extension, so it is read-only.
+    """
+    return _patterns_for_extension(os.path.splitext(file_path)[1].lower(), as_bytes)
+
+
+@lru_cache(maxsize=None)
+def _patterns_for_extension(extension: str, as_bytes: bool) -> Mapping[str, "re.Pattern"]:
+    # Start with common patterns
+    patterns = dict(COMMON_PATTERNS_BYTES if as_bytes else COMMON_PATTERNS)
+    
+    if extension == ".py":
+        # Merge python patterns
+        patterns.update(PYTHON_SUSPICIOUS_PATTERNS_BYTES if as_bytes else PYTHON_SUSPICIOUS_PATTERNS)
+    elif extension in JS_EXTENSIONS:
+        # Merge javascript patterns
+        patterns.update(JAVASCRIPT_SUSPICIOUS_PATTERNS_BYTES if as_bytes else JAVASCRIPT_SUSPICIOUS_PATTERNS)
+    
+    return MappingProxyType(patterns)
+
+
+class _ScanPlan(NamedTuple):
+    """
+    Everything scan_file_for_patterns needs for one file extension, worked out once:
+    the patterns as (name, bound findall, required literals or None), the same
+    with linear-time matching where possible, and the cache fingerprint of the
+    full pattern set.
+    """
+    checks: Tuple[Tuple[str, Callable, Optional[Tuple[str, ...]]], ...]
+    linear_checks: Tuple[Tuple[str, Callable, Optional[Tuple[str, ...]]], ...]
+    fingerprint: str
+
+
+@lru_cache(maxsize=None)
+def _scan_plan(extension: str) -> _ScanPlan:
+    """
+    Build the plan for files with this (lower-cased) extension. Cached, so the
+    per-file hot path does no dict copies or per-pattern lookups.
+
+    Each pattern keeps its own findall() rather than being fused into one
+    alternation: in CPython's re a standalone pattern gets
+    a fast literal-prefix search, which an alternation loses, so separate passes
+    measure about twice as fast as one fused pass.
+
+    linear_checks swap in RE2's linear-time equivalent of findall() wherever RE2 is
+    installed and can express the pattern (see engine.linear_findall); findings
+    are the same either way.
+    """
+    patterns = get_patterns_for_file("x" + extension, as_bytes=True)
+    checks = tuple((name, regex.findall, ALL_PATTERN_LITERALS.get(name)) for name, regex in patterns.items())
+    linear_checks = tuple((name, linear_findall(regex) or findall, literals)
+                          for (name, findall, literals), regex in zip(checks, patterns.values()))
+    return _ScanPlan(checks, linear_checks, _patterns_fingerprint(tuple(patterns)))
+
+
+def _match_patterns(content, plan: _ScanPlan) -> Dict[str, list]:
+    """
+    Run the bytes patterns of `plan` over `content` and return
+    {pattern_name: [matches...]} for every pattern that hit.
+
+    With Hyperscan/RE2 available, only the patterns it says can match are run;
+    otherwise the Aho-Corasick literal pre-pass skips patterns whose literals are absent.
+    Content of LINEAR_MATCH_MIN_BYTES or more is matched by RE2 where possible.
+    """
+    findings = {}
+
+    candidates = _PRESENCE_FILTER.matching(content)
+    if candidates is None:
+        present_literals = find_present_literals(content)
+
+    checks = plan.linear_checks if len(content) >= LINEAR_MATCH_MIN_BYTES else plan.checks
+    for pattern_name, findall, literals in checks:
+        if candidates is not None:
+            if pattern_name not in candidates:
+                continue
+        elif literals and present_literals.isdisjoint(literals):
+            continue
+        matches = findall(content)
+        if matches:
+            findings[pattern_name] = matches
+
+    return findings
+
+
+@lru_cache(maxsize=None)
+def _patterns_fingerprint(pattern_names: Tuple[str, ...]) -> str:
+    """
+    Short digest of the named patterns' sources and flags (plus SCAN_RESULTS_VERSION),
+    so editing any pattern invalidates the cached results that depended on it.
+    """
+    parts = [str(SCAN_RESULTS_VERSION).encode()]
+    for name in sorted(pattern_names):
+        regex = _ALL_PATTERNS_BYTES[name]
+        parts.append(b"%s\0%s\0%d" % (name.encode(), regex.pattern, regex.flags))
+    return content_digest(b"\n".join(parts))[:16]
+
+
+def _decode_matches(findings: Dict[str, list]) -> Dict[str, list]:
+    """
+    Convert bytes matches back to str so findings look the same whichever path produced them.
+    Only the (few, short) matches are decoded, never the file itself.
+    """
+    return {
+        name: [m.decode("utf-8", "replace") if isinstance(m, bytes)
+               else tuple(g.decode("utf-8", "replace") for g in m)
+               for m in matches]
+        for name, matches in findings.items()
+    }
+
+
+def scan_file_for_patterns(file_path: str, max_bytes: int = MAX_SCAN_BYTES, cache: Optional[ResultCache] = None) -> Dict[str, list]:
+    """
+    Scan a single file and return {pattern_name: [matches...]} for every pattern that hit.
+
+    Files over `max_bytes` (0 = no limit), and binary files (a NUL byte in the first
+    BINARY_SNIFF_BYTES), are skipped and return no findings.
+
+    The file is read once, as raw bytes: every pattern is ASCII, so matching the
+    bytes-compiled patterns skips the UTF-8 decode and the larger str copy.
+    Patterns with required literals are only run when one of their literals was
+    found by the literal pre-pass; the rest always run.
+
+    Files of MMAP_MIN_BYTES or more are mmapped, so the kernel pages them in on
+    demand instead of us copying them into memory (read normally if mmap fails).
+    Anything but a regular file (FIFO, socket, device) is skipped.
+    Only the matches are decoded, so findings are str like before.
+
+    With a `cache`, results are stored under a hash of the file content and the
+    patterns used, and an unchanged file is never matched twice.
+    """
+    plan = _scan_plan(os.path.splitext(file_path)[1].lower())
+    # Raw fd rather than open(): we always want the whole file, so Python's
+    # buffered file object would only add setup cost on every one of many small files
+    # O_NONBLOCK so opening a FIFO can't hang the scan before we get to check its type
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_NONBLOCK", 0))
+    try:
+        st = os.fstat(fd)
+        size = st.st_size
+        if not stat.S_ISREG(st.st_mode):
+            logger.debug("Skipping %s: not a regular file.", file_path)
+            return {}
+        if max_bytes and size > max_bytes:
+            logger.debug("Skipping %s: %d bytes is over the %d byte scan limit.", file_path, size, max_bytes)
+            return {}
+        content = None
+        if size >= MMAP_MIN_BYTES:
+            try:
+                content = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                # Some filesystems can't be mapped; the file may also have shrunk to 0 bytes
+                logger.debug("Could not mmap %s, reading it instead: %s", file_path, e)
+        if content is not None:
+            with content:
+                findings = _scan_content(file_path, content, plan, cache)
+        else:
+            findings = _scan_content(file_path, _read_all(fd, size), plan, cache)
+    finally:
+        os.close(fd)
+
+    # Runs for every file, so don't even loop unless the messages will be shown
+    if logger.isEnabledFor(logging.DEBUG):
+        for pattern_name, matches in findings.items():
+            logger.debug("Pattern '%s' matched in %s. %d occurrences.", pattern_name, file_path, len(matches))
+
+    return findings
+
+
+def _read_all(fd: int, size: int) -> bytes:
+    """ Read `size` bytes from `fd`; os.read() may return less than asked, even for regular files. """
+    chunks = []
+    while size > 0:
+        chunk = os.read(fd, size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks) if len(chunks) != 1 else chunks[0]
+
+
+def _scan_content(file_path: str, content, plan: _ScanPlan, cache: Optional[ResultCache] = None) -> Dict[str, list]:
+    """ Match `content` unless it looks binary, returning decoded findings. """
+    if content.find(b"\x00", 0, BINARY_SNIFF_BYTES) != -1:
+        logger.debug("Skipping %s: looks like a binary file.", file_path)
+        return {}
+
+    if cache is None:
+        return _decode_matches(_match_patterns(content, plan))
+
+    key = f"{content_digest(content)}-{plan.fingerprint}"
+    cached = cache.get(key)
+    if cached is not None:
+        # JSON has no tuples; restore the ones findall() returns for multi-group patterns
+        return {name: [tuple(m) if isinstance(m, list) else m for m in matches] for name, matches in cached.items()}
+
+    findings = _decode_matches(_match_patterns(content, plan))
+    cache.set(key, findings)
+    return findings
+
+
+def _scan_batch(file_paths: List[str], max_bytes: int = MAX_SCAN_BYTES,
+                cache: Optional[ResultCache] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """ Worker entry point for a batch of files, to amortise IPC over several scans. """
+    return [_scan_one(file_path, max_bytes, cache) for file_path in file_paths]
+
+
+def _scan_one(file_path: str, max_bytes: int = MAX_SCAN_BYTES,
+              cache: Optional[ResultCache] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Worker entry point: scan one file, turning read errors into a finding
+    so a single bad file doesn't abort the whole pool.
+    Must stay a top-level function so it can be pickled for worker processes.
+    """
+    try:
+        return file_path, scan_file_for_patterns(file_path, max_bytes, cache)
+    except Exception as e:
+        logger.error(f"Error reading file {file_path}: {e}")
+        return file_path, {"error_reading": str(e)}
+
+
 class RegexPlugin(BasePlugin):
     """
     A scanner that uses regex-based pattern matching to detect suspicious code.
 
     We now load both common patterns and language-specific patterns based on file extension.
+    Files are scanned in parallel across a process pool, since the work is CPU-bound
+    and each file is independent, starting while the directory walk is still going.
+    If ripgrep is installed, it finds the files with any match at all, and only
+    those are scanned, each as soon as ripgrep reports it.
     """
 
+    def __init__(self, max_workers: Optional[int] = None, max_file_size: int = MAX_SCAN_BYTES, use_cache: bool = True,
+                 use_ripgrep: bool = True):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_file_size = max_file_size
+        self.use_ripgrep = use_ripgrep
+        # Results keyed by file content, reused across runs (see src/utils/cache.py)
+        self.cache = ResultCache("regex") if use_cache else None
+
     def scan(self, target_path: str) -> Dict[str, Any]:
         """
         Perform the plugin's scanning on `target_path`.
         Returns a dictionary of findings.
+
+        Directories are walked lazily and files are fed to the worker pool in small
+        batches as they are discovered, so scanning starts on the first files while
+        the walk is still running. At most SCAN_IN_FLIGHT_PER_WORKER batches per
+        worker are queued at once, which keeps memory flat on huge trees.
         """
         findings = {}
-        
-        # 1. If target_path is a directory, gather all the relevant files
-        file_list = []
+
+        # 1. If target_path is a directory, discover the files lazily
         if os.path.isdir(target_path):
-            for root, dirs, files in os.walk(target_path):
-                for f in files:
-                    # Optional: filter by extension if desired
-                    file_list.append(os.path.join(root, f))
+            matches = None
+            if self.use_ripgrep:
+                matches = ripgrep_matches(_ALL_PATTERNS_BYTES, target_path, SKIP_DIRS, BINARY_EXTENSIONS)
+            if matches is not None:
+                # Files ripgrep found no match in can't have findings
+                files = self._iter_ripgrep_files(target_path, matches)
+            else:
+                files = self._iter_files(target_path)
         elif os.path.isfile(target_path):
-            file_list = [target_path]
+            files = iter([target_path])
         else:
             logger.error(f"RegexPlugin: '{target_path}' is neither file nor directory?")
             return findings
-        
-        # 2. Now iterate over the collected files
-        for file_path in file_list:
-            patterns = self.get_patterns_for_file(file_path)
-            if not patterns:
-                continue
-            
-            try:
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                    for pattern_name, pattern_regex in patterns.items():
-                        matches = pattern_regex.findall(content)
-                        if matches:
-                            logger.debug(f"Pattern '{pattern_name}' matched in {file_path}. {len(matches)} occurrences.")
-                            findings.setdefault(file_path, {})[pattern_name] = matches
-            except Exception as e:
-                logger.error(f"Error reading file {file_path}: {e}")
-                findings.setdefault(file_path, {})["error_reading"] = str(e)
-        
+
+        # 2. Scan the files, in parallel once there turn out to be enough of them
+        head = list(islice(files, PARALLEL_SCAN_MIN_FILES))
+        files = chain(head, files)
+        if self.max_workers > 1 and len(head) >= PARALLEL_SCAN_MIN_FILES:
+            results = self._scan_pipelined(files)
+        else:
+            results = map(partial(_scan_one, max_bytes=self.max_file_size, cache=self.cache), files)
+
+        for file_path, file_findings in results:
+            if file_findings:
+                findings[file_path] = file_findings
+
+        if os.path.isdir(target_path) and matches is not None:
+            # ripgrep reports files in whatever order its threads finish them
+            findings = dict(sorted(findings.items()))
         return findings
 
-    def get_patterns_for_file(self, file_path: str) -> dict:
+    def _iter_files(self, target_path: str) -> Iterator[str]:
+        """
+        Yield every file under `target_path` as the walk reaches it, in os.walk() order
+        (a directory's files, then its subdirectories; symlinked directories not followed).
+        SKIP_DIRS are not descended into, and BINARY_EXTENSIONS files are left out unopened.
+
+        Uses os.scandir() directly: DirEntry.is_dir() answers from the directory
+        listing's d_type, and we skip os.walk()'s per-directory name lists and joins.
+        """
+        stack = [target_path]
+        while stack:
+            current_dir = stack.pop()
+            subdirs = []
+            try:
+                with os.scandir(current_dir) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if not is_dir:
+                            if os.path.splitext(entry.name)[1].lower() not in BINARY_EXTENSIONS:
+                                yield entry.path
+                        elif entry.name not in SKIP_DIRS and not entry.is_symlink():
+                            subdirs.append(entry.path)
+            except OSError as e:
+                logger.debug("Could not list directory %s: %s", current_dir, e)
+            # Reversed, so the first subdirectory is popped (and walked) first
+            stack.extend(reversed(subdirs))
+
+    def _iter_ripgrep_files(self, target_path: str, matches: Iterator[str]) -> Iterator[str]:
+        """
+        Yield the files of _iter_files() that ripgrep reports in `matches`, as it reports them.
+
+        ripgrep already leaves out SKIP_DIRS and BINARY_EXTENSIONS, but it also enters
+        symlinked directories, so files below one are dropped here. If ripgrep fails
+        partway, the walk takes over for every file not yielded yet.
+        """
+        yielded = set()
+        symlinked = {}
+        try:
+            for path in matches:
+                rel_path = os.path.relpath(path, target_path)
+                parts = rel_path.split(os.sep)
+                current_dir = target_path
+                below_symlink = False
+                for part in parts[:-1]:
+                    current_dir = os.path.join(current_dir, part)
+                    if current_dir not in symlinked:
+                        symlinked[current_dir] = os.path.islink(current_dir)
+                    if symlinked[current_dir]:
+                        below_symlink = True
+                        break
+                if not below_symlink:
+                    file_path = os.path.join(target_path, rel_path)
+                    yielded.add(file_path)
+                    yield file_path
+        except RipgrepError as e:
+            logger.debug(f"{e}, scanning the remaining files instead")
+            for file_path in self._iter_files(target_path):
+                if os.path.join(target_path, os.path.relpath(file_path, target_path)) not in yielded:
+                    yield file_path
+
+    def _scan_pipelined(self, files: Iterator[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Producer/consumer scan: batches of paths are submitted to the process pool
+        while `files` is still being produced. Results come back in walk order.
+        """
+        max_in_flight = self.max_workers * SCAN_IN_FLIGHT_PER_WORKER
+        batch_results = {}
+        in_flight = {}
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            batch_index = 0
+            while True:
+                batch = list(islice(files, SCAN_BATCH_SIZE))
+                if batch:
+                    future = executor.submit(_scan_batch, batch, self.max_file_size, self.cache)
+                    in_flight[future] = batch_index
+                    batch_index += 1
+                # Wait for a free slot when the queue is full, or for everything once the walk is done
+                if len(in_flight) >= max_in_flight or (not batch and in_flight):
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch_results[in_flight.pop(future)] = future.result()
+                if not batch and not in_flight:
+                    break
+
+        return [result for idx in range(batch_index) for result in batch_results[idx]]
+
+    def get_patterns_for_file(self, file_path: str) -> Mapping[str, "re.Pattern"]:
         """
         Determine which patterns to apply based on the file extension.
-        
-        - Always include common patterns.
-        - If file ends with .py, also include Python-specific patterns.
-        - If file ends with .js, .jsx, .ts, .tsx, include JS patterns.
-        - Other languages: Just common patterns for now.
+        See the module-level get_patterns_for_file().
         """
-        extension = os.path.splitext(file_path)[1].lower()
-        patterns = COMMON_PATTERNS.copy()  # Start with common patterns
-        
-        if extension == ".py":
-            # Merge python patterns
-            patterns.update(PYTHON_SUSPICIOUS_PATTERNS)
-        elif extension in [".js", ".jsx", ".ts", ".tsx"]:
-            # Merge javascript patterns
-            patterns.update(JAVASCRIPT_SUSPICIOUS_PATTERNS)
-        
-        return patterns
+        return get_patterns_for_file(file_path)
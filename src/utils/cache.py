@@ -0,0 +1,78 @@
+# project_root/src/utils/cache.py
+"""
+On-disk cache for scan results, so re-scanning unchanged content is instant.
+
+Entries live under CACHE_DIR/<namespace>/ as one small JSON file per key,
+written atomically (temp file + os.replace). That makes the cache safe to use
+from several worker processes at once without any locking: readers either see
+a complete entry or none at all.
+
+Keys are whatever the caller chooses, typically content_digest() of the input
+plus a fingerprint of everything else the result depends on.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Optional
+
+from src.utils.config import CACHE_DIR
+from src.utils.logger import logger
+
+try:
+    import xxhash
+except ImportError:
+    # Optional: hashlib's blake2b is slower but always available
+    xxhash = None
+
+
+def content_digest(data) -> str:
+    """ Fast, non-cryptographic-strength hex digest of bytes-like `data` (bytes, mmap, ...). """
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """
+    A namespace of JSON-serialisable values keyed by strings.
+    Any I/O or decode problem is treated as a cache miss, never as an error.
+    """
+
+    def __init__(self, namespace: str, directory: str = CACHE_DIR):
+        self.directory = os.path.join(directory, namespace)
+
+    def _path(self, key: str) -> str:
+        # Fan out over subdirectories so no single directory grows huge
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """
+        Value stored under `key`, or None. With `max_age` (seconds), entries
+        written longer ago than that count as missing, for results that go stale
+        (e.g. vulnerability databases).
+        """
+        path = self._path(key)
+        try:
+            if max_age is not None and time.time() - os.stat(path).st_mtime > max_age:
+                return None
+            with open(path, "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug(f"Could not write cache entry {key}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
@@ -3,6 +3,62 @@
 Configuration and constants for the scanning tool.
 """
 
+import os
+
 # File extensions to scan in MVP. Can be expanded later.
-FILE_EXTENSIONS_TO_SCAN = [".py", ".js", ".ts", ".jsx", ".tsx"]
+# A tuple, so str.endswith(FILE_EXTENSIONS_TO_SCAN) tests them all in one call.
+FILE_EXTENSIONS_TO_SCAN = (".py", ".js", ".ts", ".jsx", ".tsx")
+
+# JavaScript/TypeScript extensions, as a tuple so a single str.endswith() call can test them all
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx")
+
+# Write buffer of the report file: the report is written line by line, and this
+# makes that one write() syscall per MiB instead of one per 8 KiB
+REPORT_BUFFER_BYTES = 1024 * 1024
+
+# Vulnerability descriptions and Bandit issue texts longer than this are cut short in the
+# report (OSV "details" can run to several KB each). --full-descriptions keeps them whole.
+REPORT_DESCRIPTION_MAX_CHARS = 240
+
+# Concurrent fetches in fetch_code_sources(), byte ranges per large download and zip extraction
+# threads (capped at the CPU count); clones and downloads mostly wait on the network
+FETCH_PARALLELISM = 8
+
+
+# Directories never descended into when walking a repo: VCS metadata, vendored
+# dependencies and caches. Skipping them is usually the biggest walk-time saver.
+SKIP_DIRS = frozenset({".git", "node_modules", "__pycache__", ".venv", "venv"})
+
+# Files larger than this are not pattern-scanned (minified bundles, dist artifacts, data dumps).
+# Overridable with --max-file-size; 0 disables the limit.
+MAX_SCAN_BYTES = 2 * 1024 * 1024
+
+# Extensions of formats that are never source text (images, archives, fonts, media, compiled
+# objects). The pattern scanner skips these without opening them.
+BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp",
+    ".pdf", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".jar", ".whl",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot",
+    ".mp3", ".mp4", ".wav", ".ogg", ".webm", ".mov",
+    ".so", ".dll", ".dylib", ".exe", ".o", ".a", ".pyc", ".class",
+})
+
+# What a partial GitHub clone checks out (non-cone sparse-checkout patterns): every file
+# except those the scanners skip anyway, i.e. binary formats and files under SKIP_DIRS.
+# The pattern scanner reads all other files (shell scripts, workflows, HTML, ...),
+# so their blobs are needed; only the skipped ones are never downloaded.
+SPARSE_CHECKOUT_PATTERNS = (["/*"]
+                            + [f"!*{ext}" for ext in sorted(BINARY_EXTENSIONS)]
+                            + [f"!{name}/" for name in sorted(SKIP_DIRS)])
+
+# A NUL byte within this many leading bytes marks a file as binary, and it is skipped
+BINARY_SNIFF_BYTES = 8192
+
+# Files larger than this are not sent to the LLM (--llm); they would not fit a prompt anyway
+LLM_MAX_FILE_BYTES = 100 * 1024
+
+# Where cached scan results are kept between runs (disable with --no-cache)
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "reposcan")
 
+# Dependency audit results are reused for this long, since advisory databases keep changing
+AUDIT_CACHE_TTL_SECONDS = 24 * 60 * 60
@@ -0,0 +1,79 @@
+# project_root/src/utils/fast_json.py
+"""
+JSON parsing for large tool output (pip-audit, npm audit, ESLint, Bandit).
+
+orjson is several times faster than the json module and parses bytes directly,
+so subprocess output never has to be decoded to str first. Without it we fall
+back to json.loads, which also accepts bytes. dumps() likewise writes bytes,
+ready for a binary file.
+
+iter_array() and iter_object_values() stream one member of a large document
+from a file object with ijson (yajl2 backend when available), so only one
+element is in memory at a time. Without ijson the whole document is parsed.
+"""
+
+import json
+from typing import Any, BinaryIO, Iterator
+
+try:
+    import orjson
+except ImportError:
+    # Optional: json is slower but always available
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    # Optional: without it, streamed documents are parsed whole
+    ijson = None
+
+# Raised by loads() on malformed input (orjson's error subclasses it too)
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """ Parse JSON from bytes or str. """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize `obj` to UTF-8 JSON bytes. Values JSON has no type for are written
+    as their str(), and non-string dict keys are converted, so scan results always serialize.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str, ensure_ascii=False).encode("utf-8")
+
+
+def _load_member(stream: BinaryIO, key: str, default):
+    document = loads(stream.read())
+    return document.get(key, default) if isinstance(document, dict) else default
+
+
+def iter_array(stream: BinaryIO, key: str) -> Iterator[Any]:
+    """
+    Yield the elements of the array under top-level `key` of the JSON document in
+    `stream`. Raises JSONDecodeError on malformed input, possibly after some items.
+    """
+    if ijson is None:
+        yield from _load_member(stream, key, [])
+        return
+    try:
+        yield from ijson.items(stream, f"{key}.item", use_float=True)
+    except ijson.JSONError as e:
+        raise JSONDecodeError(str(e), "", 0) from e
+
+
+def iter_object_values(stream: BinaryIO, key: str) -> Iterator[Any]:
+    """ Like iter_array(), for the values of the object under top-level `key`. """
+    if ijson is None:
+        yield from _load_member(stream, key, {}).values()
+        return
+    try:
+        for _, value in ijson.kvitems(stream, key, use_float=True):
+            yield value
+    except ijson.JSONError as e:
+        raise JSONDecodeError(str(e), "", 0) from e
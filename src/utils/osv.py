@@ -0,0 +1,131 @@
+# project_root/src/utils/osv.py
+"""
+Look up known vulnerabilities of exact package versions in the OSV database (https://osv.dev).
+
+pip-audit and npm audit ultimately answer from the same advisories, but each
+run starts a Python/Node runtime and resolves the dependency graph first. For
+dependencies that are already pinned, one /v1/querybatch request answers for
+up to OSV_BATCH_SIZE packages at once, and no resolver is needed.
+
+querybatch only returns vulnerability IDs, so summaries and severities are
+fetched per ID from /v1/vulns/<id>. These are cached on disk by ID and
+modification time, since a given revision of an advisory never changes.
+
+The advisory IDs affecting each (ecosystem, name, version) are cached too, for
+AUDIT_CACHE_TTL_SECONDS: a repeat run only asks OSV about packages it hasn't
+seen recently, however the dependency lists are combined.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from src.utils.cache import ResultCache, content_digest
+from src.utils.config import AUDIT_CACHE_TTL_SECONDS
+from src.utils.logger import logger
+
+OSV_API_URL = "https://api.osv.dev/v1"
+
+# Most queries OSV accepts in one querybatch request
+OSV_BATCH_SIZE = 1000
+
+# Seconds to wait for an OSV response before falling back to the audit tools
+OSV_TIMEOUT_SECONDS = 30
+
+# Concurrent /v1/vulns/<id> requests when fetching advisory details
+OSV_DETAIL_WORKERS = 8
+
+
+class OSVClient:
+    """
+    Thin client for the OSV API, sharing one keep-alive HTTP session between requests.
+    query() returns None on any network or API error so callers can fall back.
+    """
+
+    def __init__(self, use_cache: bool = True):
+        self.session = requests.Session()
+        self.cache = ResultCache("osv") if use_cache else None
+
+    def query(self, deps: List[Tuple[str, str]], ecosystem: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Vulnerabilities of the exact (name, version) pairs in `deps` within `ecosystem`
+        ("PyPI", "npm", ...), shaped like the audit findings of DependencyPlugin:
+        [{"package", "version", "vulnerabilities": [{"id", "description", "severity"}]}].
+        """
+        vulns_by_dep: Dict[Tuple[str, str], List[dict]] = {}
+        misses = []
+        for dep in dict.fromkeys(deps):
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(self._package_key(ecosystem, *dep), max_age=AUDIT_CACHE_TTL_SECONDS)
+            if cached is None:
+                misses.append(dep)
+            else:
+                vulns_by_dep[dep] = cached
+        if misses:
+            logger.debug(f"OSV: {len(vulns_by_dep)} packages cached, querying {len(misses)} {ecosystem} packages")
+
+        for start in range(0, len(misses), OSV_BATCH_SIZE):
+            chunk = misses[start:start + OSV_BATCH_SIZE]
+            payload = {"queries": [
+                {"package": {"ecosystem": ecosystem, "name": name}, "version": version}
+                for name, version in chunk
+            ]}
+            try:
+                response = self.session.post(f"{OSV_API_URL}/querybatch", json=payload, timeout=OSV_TIMEOUT_SECONDS)
+                response.raise_for_status()
+                results = response.json().get("results", [])
+            except (requests.RequestException, ValueError) as e:
+                logger.warning(f"OSV query failed: {e}")
+                return None
+            for dep, result in zip(chunk, results):
+                # Only the references are kept; details come from _vuln_details()
+                vulns = [{"id": v["id"], "modified": v.get("modified", "")} for v in (result or {}).get("vulns") or [] if v.get("id")]
+                vulns_by_dep[dep] = vulns
+                if self.cache is not None:
+                    self.cache.set(self._package_key(ecosystem, *dep), vulns)
+
+        vuln_refs = [(name, version, vulns_by_dep[(name, version)]) for name, version in deps if vulns_by_dep.get((name, version))]
+
+        refs = {(v["id"], v.get("modified", "")) for _, _, vulns in vuln_refs for v in vulns if v.get("id")}
+        with ThreadPoolExecutor(max_workers=OSV_DETAIL_WORKERS) as executor:
+            details = dict(zip(refs, executor.map(lambda ref: self._vuln_details(*ref), refs)))
+
+        findings = []
+        for name, version, vulns in vuln_refs:
+            findings.append({
+                "package": name,
+                "version": version,
+                "vulnerabilities": [details[(v["id"], v.get("modified", ""))] for v in vulns if v.get("id")]
+            })
+        return findings
+
+    @staticmethod
+    def _package_key(ecosystem: str, name: str, version: str) -> str:
+        return content_digest(f"pkg\0{ecosystem}\0{name}\0{version}".encode("utf-8"))
+
+    def _vuln_details(self, vuln_id: str, modified: str) -> Dict[str, Any]:
+        """ {"id", "description", "severity"} for one advisory revision; just the ID if it can't be fetched. """
+        key = f"{vuln_id}-{modified}".replace("/", "_").replace(":", "_")
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+
+        try:
+            response = self.session.get(f"{OSV_API_URL}/vulns/{vuln_id}", timeout=OSV_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            vuln = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.debug(f"Could not fetch OSV details for {vuln_id}: {e}")
+            return {"id": vuln_id, "description": None, "severity": "unknown"}
+
+        severity = (vuln.get("database_specific") or {}).get("severity") or "unknown"
+        entry = {
+            "id": vuln_id,
+            "description": vuln.get("summary") or vuln.get("details"),
+            "severity": str(severity).lower()
+        }
+        if self.cache is not None:
+            self.cache.set(key, entry)
+        return entry
@@ -27,7 +27,9 @@ Supported input formats:
 Logic:
 - The main entry point is `fetch_code_source(repo_input)`.
 - It checks the format of `repo_input` and calls the corresponding fetch function.
-- Each fetch function returns a local path (directory or file) to be scanned.
+- Each fetch function returns a local path (directory or file) to be scanned,
+  or raises FetchError if the input can't be fetched.
+- `fetch_code_sources(repo_inputs)` fetches several inputs at once.
 
 Note:
 - For GitHub, we still clone via `git clone`.
@@ -35,19 +37,61 @@ Note:
 This modular design can be extended to support more sources easily.
 """
 
+import hashlib
 import os
-import sys
 import re
 import tempfile
 import shutil
 import subprocess
 import tarfile
 import zipfile
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator, List, Optional
 from pathlib import Path
-from src.utils.config import FILE_EXTENSIONS_TO_SCAN
+from src.utils.config import CACHE_DIR, FETCH_PARALLELISM, SPARSE_CHECKOUT_PATTERNS
 from src.utils.logger import logger
 
+if TYPE_CHECKING:
+    import requests
+
+# Bytes read per iteration when streaming a download to disk
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# Downloads at least this large are split into parallel range requests when the server allows
+RANGED_DOWNLOAD_MIN_BYTES = 32 * 1024 * 1024
+
+# Zip archives with at least this many members are extracted by several threads
+PARALLEL_EXTRACT_MIN_MEMBERS = 256
+
+
+@lru_cache(maxsize=None)
+def _http() -> "requests.Session":
+    """
+    One keep-alive session for every download, so repeated requests to the same
+    host (pypi.org, files.pythonhosted.org, raw.githubusercontent.com, ...) reuse
+    a connection instead of each paying a new TCP and TLS handshake. Transient
+    connection errors and 5xx gateway responses are retried with backoff.
+
+    Built on first use: importing requests (and urllib3 with it) takes tens of
+    milliseconds, which scans of a local path have no reason to pay.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=FETCH_PARALLELISM * 4, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = f"reposcan {session.headers['User-Agent']}"
+    return session
+
+class FetchError(Exception):
+    """ An input could not be fetched; the message says why. """
+
+
 #############################
 # Helper detection functions
 #############################
@@ -119,7 +163,8 @@ def fetch_github_repo(repo_input: str) -> str:
 
     Steps:
     1. Normalize the URL to a standard git clone URL if needed.
-    2. git clone into a temp directory.
+    2. Partial-clone into a temp directory, checking out only SPARSE_CHECKOUT_PATTERNS
+       (falls back to a plain shallow clone if the server or git is too old).
     3. Return the temp directory path.
     """
     logger.info(f"Fetching GitHub repo: {repo_input}")
@@ -133,25 +178,209 @@ def fetch_github_repo(repo_input: str) -> str:
         # Already starts with https://github.com/
         repo_url = repo_input
 
+    # Leave Git LFS pointer files as they are rather than downloading the (usually binary) objects,
+    # and fail straight away on a private or mistyped repo instead of waiting at a credentials prompt
+    git_env = {**os.environ, "GIT_LFS_SKIP_SMUDGE": "1", "GIT_TERMINAL_PROMPT": "0"}
+
     tmp_dir = tempfile.mkdtemp(prefix="repo_scan_")
     try:
-        subprocess.run(["git", "clone", "--depth", "1", repo_url, tmp_dir], check=True)
-        logger.debug("Clone completed successfully.")
+        # Blobless, no-checkout clone, then fetch only the blobs of files we actually scan
+        subprocess.run(["git", "clone", "--depth", "1", "--no-tags", "--filter=blob:none", "--no-checkout", repo_url, tmp_dir],
+                       check=True, env=git_env)
+        subprocess.run(["git", "-C", tmp_dir, "sparse-checkout", "set", "--no-cone", *SPARSE_CHECKOUT_PATTERNS], check=True, env=git_env)
+        subprocess.run(["git", "-C", tmp_dir, "checkout"], check=True, env=git_env)
+        logger.info("Cloned repository with a partial (sparse, blobless) clone.")
+        return tmp_dir
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"Partial clone failed ({e}), falling back to a full shallow clone.")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+    try:
+        subprocess.run(["git", "clone", "--depth", "1", "--no-tags", repo_url, tmp_dir], check=True, env=git_env)
+        logger.info("Cloned repository with a full shallow clone.")
         return tmp_dir
     except subprocess.CalledProcessError as e:
         shutil.rmtree(tmp_dir)
-        logger.error(f"Error: Failed to clone repository. {e}")
-        sys.exit(1)
+        raise FetchError(f"Failed to clone repository {repo_url}: {e}") from e
+
+def _download_to(url: str, path: str) -> str:
+    """
+    Stream `url` into the file at `path`; returns the SHA-256 hex digest of what was written.
+    Files of RANGED_DOWNLOAD_MIN_BYTES or more are fetched in FETCH_PARALLELISM byte ranges
+    at once when the server accepts range requests (see _download_ranges). If any range
+    fails, the partial file is dropped and the download starts over as a single stream.
+    """
+    import requests
+
+    with _http().get(url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        size = int(response.headers.get('Content-Length') or 0)
+        if not (FETCH_PARALLELISM > 1 and size >= RANGED_DOWNLOAD_MIN_BYTES
+                and response.headers.get('Accept-Ranges') == 'bytes'
+                and not response.headers.get('Content-Encoding')):
+            return _stream_to(response, path)
+
+        try:
+            _download_ranges(response, size, path)
+        except (requests.RequestException, OSError) as e:
+            logger.warning(f"Ranged download of {url} failed ({e}), retrying as a single stream")
+            if os.path.exists(path):
+                os.unlink(path)
+        else:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                while chunk := f.read(DOWNLOAD_CHUNK_BYTES * 16):
+                    digest.update(chunk)
+            return digest.hexdigest()
+
+    with _http().get(url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        return _stream_to(response, path)
+
+
+def _stream_to(response: "requests.Response", path: str) -> str:
+    """ Write the body of a streamed `response` to `path`; returns its SHA-256 hex digest. """
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+            f.write(chunk)
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _download_ranges(response: "requests.Response", size: int, path: str) -> None:
+    """
+    Write the `size` bytes behind `response` to `path` in FETCH_PARALLELISM parts:
+    the first is read from `response` itself, the others with Range requests
+    to its final URL, each written at its own offset.
+    """
+    part_size = -(-size // FETCH_PARALLELISM)
+    bounds = [(start, min(start + part_size, size)) for start in range(0, size, part_size)]
+
+    def write_part(fd: int, stream: Iterator[bytes], start: int, end: int) -> None:
+        offset = start
+        for chunk in stream:
+            chunk = chunk[:end - offset]
+            os.pwrite(fd, chunk, offset)
+            offset += len(chunk)
+            if offset >= end:
+                return
+        raise IOError(f"Connection closed after {offset - start} of {end - start} bytes")
+
+    def fetch_part(fd: int, start: int, end: int) -> None:
+        headers = {'Range': f'bytes={start}-{end - 1}'}
+        with _http().get(response.url, headers=headers, stream=True, timeout=30) as part:
+            part.raise_for_status()
+            if part.status_code != 206:
+                raise IOError(f"Range request to {response.url} answered with {part.status_code}")
+            write_part(fd, part.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES), start, end)
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        with ThreadPoolExecutor(max_workers=len(bounds) - 1) as executor:
+            parts = [executor.submit(fetch_part, fd, start, end) for start, end in bounds[1:]]
+            write_part(fd, response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES), *bounds[0])
+            for part in parts:
+                part.result()
+    finally:
+        os.close(fd)
 
-def fetch_pypi_package(package_name: str) -> str:
+
+def _cached_download(url: str, sha256: str, filename: str) -> str:
+    """
+    Path of the archive published at `url` with SHA-256 `sha256`, kept under
+    CACHE_DIR/downloads/ so a release is downloaded only once. Releases are
+    immutable, so the digest alone identifies the content; it is checked on download.
+    """
+    cache_dir = os.path.join(CACHE_DIR, "downloads", sha256[:2], sha256)
+    path = os.path.join(cache_dir, filename)
+    if os.path.isfile(path):
+        logger.info(f"Using cached download of {filename}")
+        return path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        actual = _download_to(url, tmp_path)
+        if actual != sha256:
+            raise ValueError(f"{filename} has SHA-256 {actual}, expected {sha256}")
+        # Atomic, so a concurrent or interrupted run never sees a partial archive
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return path
+
+
+def _tar_member_filter(member: tarfile.TarInfo, dest_path: str) -> Optional[tarfile.TarInfo]:
+    """
+    tarfile's 'data' filter, except that a refused member is skipped (and logged)
+    rather than aborting the extraction: the packages we fetch are exactly the ones
+    that may be hostile, and we still want to scan the rest of them.
+    """
+    try:
+        return tarfile.data_filter(member, dest_path)
+    except tarfile.FilterError as e:
+        logger.warning(f"Not extracting {member.name}: {e}")
+        return None
+
+
+def _extract_tar(archive_path: str, extract_dir: str) -> None:
+    """
+    Extract a .tar.gz into `extract_dir`. Where tarfile supports extraction filters
+    (3.12, and 3.8-3.11 security releases), members are extracted as plain data:
+    nothing outside extract_dir, no device files, no owner or special mode bits.
+    """
+    with tarfile.open(archive_path, 'r:gz') as tar:
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(extract_dir, filter=_tar_member_filter)
+        else:
+            tar.extractall(extract_dir)
+
+
+def _extract_zip(archive_path: str, extract_dir: str) -> None:
+    """
+    Extract a .zip or .whl into `extract_dir`. On multi-core machines, archives of
+    PARALLEL_EXTRACT_MIN_MEMBERS or more are split into contiguous runs of members,
+    each extracted by its own thread through its own ZipFile, so decompression (zlib
+    drops the GIL) and file writes overlap. tar.gz has no such path: its single gzip
+    stream can only be read in order.
+    """
+    workers = min(FETCH_PARALLELISM, os.cpu_count() or 1)
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        members = zip_ref.infolist()
+        if workers < 2 or len(members) < PARALLEL_EXTRACT_MIN_MEMBERS:
+            zip_ref.extractall(extract_dir)
+            return
+
+    def extract_run(run: List[zipfile.ZipInfo]) -> None:
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            for member in run:
+                try:
+                    zip_ref.extract(member, extract_dir)
+                except FileExistsError:
+                    # Another thread created the same parent directory in between; it exists now
+                    zip_ref.extract(member, extract_dir)
+
+    run_size = -(-len(members) // workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(extract_run, (members[i:i + run_size] for i in range(0, len(members), run_size))))
+
+
+def fetch_pypi_package(package_name: str, use_cache: bool = True) -> str:
     """
     Fetch a PyPI package and extract its contents.
     Form: pypi:packagename
     
-    Attempts to fetch source code in this order:
-    1. Try PyPI JSON API to get source distribution
-    2. Try pip download with --no-binary flag
-    3. Fall back to regular pip download if both above fail
+    The PyPI JSON API lists the files of the latest release: its source distribution
+    is fetched, or a wheel (pure-Python preferred) when no sdist was published.
+    Only if the API can't be used does a single `pip download` run instead.
+
+    With use_cache, files from the JSON API are kept by SHA-256 (see _cached_download)
+    and only extracted again on later runs.
     
     Returns:
         str: Path to directory containing extracted package
@@ -160,17 +389,16 @@ def fetch_pypi_package(package_name: str) -> str:
     
     def extract_archive(archive_path: str, extract_dir: str) -> None:
         if archive_path.endswith('.tar.gz'):
-            with tarfile.open(archive_path, 'r:gz') as tar:
-                tar.extractall(extract_dir)
+            _extract_tar(archive_path, extract_dir)
         elif archive_path.endswith(('.zip', '.whl')):
-            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
+            _extract_zip(archive_path, extract_dir)
 
     def get_package_dir(extract_dir: str) -> str:
-        subdirs = [d for d in os.listdir(extract_dir) 
-                  if os.path.isdir(os.path.join(extract_dir, d))]
-        if subdirs:
-            return os.path.join(extract_dir, subdirs[0])
+        # First subdirectory in listing order; DirEntry.is_dir() mostly answers without a stat()
+        with os.scandir(extract_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    return entry.path
         return extract_dir
 
     tmp_dir = tempfile.mkdtemp(prefix="repo_scan_pypi_")
@@ -182,56 +410,44 @@ def fetch_pypi_package(package_name: str) -> str:
         try:
             logger.debug(f"Attempting to fetch source distribution via PyPI API for {package_name}")
             pypi_url = f"https://pypi.org/pypi/{package_name}/json"
-            response = requests.get(pypi_url)
+            response = _http().get(pypi_url, timeout=30)
             response.raise_for_status()
             package_data = response.json()
             
-            # Look for source distribution
-            sdist_url = None
+            # Source distribution first, then a wheel; pure-Python wheels carry the most source
+            dist_info = None
             for url_info in package_data['urls']:
                 if url_info['packagetype'] == 'sdist':
-                    sdist_url = url_info['url']
+                    dist_info = url_info
                     break
-                    
-            if sdist_url:
-                response = requests.get(sdist_url, stream=True)
-                response.raise_for_status()
-                
-                archive_path = os.path.join(tmp_dir, os.path.basename(sdist_url))
-                with open(archive_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                if url_info['packagetype'] == 'bdist_wheel':
+                    if dist_info is None or (url_info['filename'].endswith('-none-any.whl')
+                                             and not dist_info['filename'].endswith('-none-any.whl')):
+                        dist_info = url_info
+
+            if dist_info:
+                dist_url = dist_info['url']
+                dist_sha256 = (dist_info.get('digests') or {}).get('sha256')
+                archive_name = os.path.basename(dist_url)
+                if use_cache and dist_sha256:
+                    archive_path = _cached_download(dist_url, dist_sha256, archive_name)
+                else:
+                    archive_path = os.path.join(tmp_dir, archive_name)
+                    _download_to(dist_url, archive_path)
                 
                 extract_archive(archive_path, extract_dir)
+                if archive_name.endswith('.whl'):
+                    # Wheels have no top-level project directory; their packages sit side by side
+                    return extract_dir
                 return get_package_dir(extract_dir)
         except Exception as e:
             logger.debug(f"PyPI API attempt failed: {str(e)}")
 
-        # Second attempt: pip download with --no-binary flag
-        try:
-            logger.debug(f"Attempting pip download with --no-binary flag for {package_name}")
-            subprocess.run(
-                ["pip", "download", "--no-deps", "--no-binary", ":all:", 
-                 package_name, "-d", tmp_dir],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            archives = [f for f in os.listdir(tmp_dir) 
-                       if f.endswith(('.tar.gz', '.zip'))]
-            
-            if archives:
-                archive_path = os.path.join(tmp_dir, archives[0])
-                extract_archive(archive_path, extract_dir)
-                return get_package_dir(extract_dir)
-        except Exception as e:
-            logger.debug(f"pip --no-binary attempt failed: {str(e)}")
-
-        # Final attempt: regular pip download
-        logger.warning(f"Falling back to regular pip download for {package_name}")
+        # Fallback: one pip download, which also honours a configured index
+        logger.warning(f"Falling back to pip download for {package_name}")
         subprocess.run(
-            ["pip", "download", "--no-deps", package_name, "-d", tmp_dir],
+            ["pip", "download", "--no-deps", "--progress-bar", "off", "--quiet",
+             package_name, "-d", tmp_dir],
             check=True,
             capture_output=True,
             text=True
@@ -245,15 +461,17 @@ def fetch_pypi_package(package_name: str) -> str:
             
         archive_path = os.path.join(tmp_dir, archives[0])
         extract_archive(archive_path, extract_dir)
+        if archive_path.endswith('.whl'):
+            return extract_dir
         return get_package_dir(extract_dir)
         
     except Exception as e:
-        logger.error(f"All attempts to fetch package {package_name} failed: {str(e)}")
         shutil.rmtree(tmp_dir)
-        sys.exit(1)
+        raise FetchError(f"All attempts to fetch package {package_name} failed: {str(e)}") from e
 
+@lru_cache(maxsize=1)
 def is_npm_installed() -> bool:
-    """Check if npm is available in the system."""
+    """Check if npm is available in the system. Probed once per process."""
     try:
         subprocess.run(
             ["npm", "--version"],
@@ -282,8 +500,7 @@ def fetch_npm_package(package_name: str) -> str:
     logger.info(f"Fetching NPM package: {package_name}")
     
     if not is_npm_installed():
-        logger.error("npm is not installed. Please install Node.js and npm first.")
-        sys.exit(1)
+        raise FetchError("npm is not installed. Please install Node.js and npm first.")
     
     # Create temp directories
     tmp_dir = tempfile.mkdtemp(prefix="repo_scan_npm_")
@@ -309,9 +526,8 @@ def fetch_npm_package(package_name: str) -> str:
             raise FileNotFoundError(f"NPM pack did not create expected tarball: {tarball_path}")
             
         # Extract the tarball
-        with tarfile.open(tarball_path, 'r:gz') as tar:
-            # npm packages have a 'package' directory at root
-            tar.extractall(extract_dir)
+        # npm packages have a 'package' directory at root
+        _extract_tar(tarball_path, extract_dir)
             
         # The contents will be in a 'package' directory
         package_dir = os.path.join(extract_dir, 'package')
@@ -321,13 +537,11 @@ def fetch_npm_package(package_name: str) -> str:
         return package_dir
         
     except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to fetch npm package {package_name}: {e.stderr}")
         shutil.rmtree(tmp_dir)
-        sys.exit(1)
+        raise FetchError(f"Failed to fetch npm package {package_name}: {e.stderr}") from e
     except Exception as e:
-        logger.error(f"Error processing npm package {package_name}: {str(e)}")
         shutil.rmtree(tmp_dir)
-        sys.exit(1)
+        raise FetchError(f"Error processing npm package {package_name}: {str(e)}") from e
 
 def fetch_github_file(file_url: str) -> str:
     """
@@ -357,33 +571,31 @@ def fetch_remote_file(file_url: str) -> str:
     3. Return the file path
 
     Raises:
-        requests.exceptions.RequestException: If download fails
+        FetchError: If the download fails
     """
+    import requests
+
     logger.info(f"Fetching remote file: {file_url}")
     tmp_dir = tempfile.mkdtemp(prefix="repo_scan_file_")
     filename = os.path.basename(file_url)
     local_path = os.path.join(tmp_dir, filename)
     
     try:
-        response = requests.get(file_url, timeout=30)
-        response.raise_for_status()  # Raises an HTTPError for bad responses
-        
-        with open(local_path, 'wb') as f:
-            f.write(response.content)
+        # Streamed to disk as it arrives, so memory use doesn't grow with the file size
+        _download_to(file_url, local_path)
             
         logger.debug(f"Successfully downloaded {file_url} to {local_path}")
         return local_path
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, OSError) as e:
         shutil.rmtree(tmp_dir)
-        logger.error(f"Failed to download {file_url}: {str(e)}")
-        sys.exit(1)
+        raise FetchError(f"Failed to download {file_url}: {str(e)}") from e
 
 #############################
 # Main fetch entry point
 #############################
 
-def fetch_code_source(repo_input: str) -> str:
+def fetch_code_source(repo_input: str, use_cache: bool = True) -> str:
     """
     Determine the type of input and fetch the code accordingly.
 
@@ -394,7 +606,8 @@ def fetch_code_source(repo_input: str) -> str:
     4. Remote file input?
     5. Local file or directory?
 
-    Return a local path (dir or file) ready for scanning.
+    Return a local path (dir or file) ready for scanning; raises FetchError on failure.
+    With use_cache=False, downloads are never taken from or added to the on-disk cache.
     """
     if is_github_file_url(repo_input):
         return fetch_github_file(repo_input)
@@ -404,7 +617,7 @@ def fetch_code_source(repo_input: str) -> str:
 
     if is_pypi_input(repo_input):
         package_name = repo_input.split(":", 1)[1]
-        return fetch_pypi_package(package_name.strip())
+        return fetch_pypi_package(package_name.strip(), use_cache=use_cache)
 
     if is_npm_input(repo_input):
         package_name = repo_input.split("npm:", 1)[1]
@@ -418,27 +631,23 @@ def fetch_code_source(repo_input: str) -> str:
         logger.debug(f"Local path detected: {repo_input}")
         return repo_input
     else:
-        logger.error(f"Error: The path '{repo_input}' does not match any known format and is not local.")
-        sys.exit(1)
+        raise FetchError(f"The path '{repo_input}' does not match any known format and is not local.")
 
 
-def gather_files(repo_path: str) -> list:
+def fetch_code_sources(repo_inputs: List[str], max_workers: int = FETCH_PARALLELISM,
+                       use_cache: bool = True) -> List[Optional[str]]:
     """
-    If repo_path is a file, return just that file.
-    If repo_path is a directory, recursively gather files matching certain extensions.
+    fetch_code_source() for several inputs at once, overlapping their downloads in
+    a thread pool. Returns the local paths in the order of `repo_inputs`, with None
+    for any input that could not be fetched (its FetchError is logged), so one bad
+    input doesn't stop the others.
     """
-    if os.path.isfile(repo_path):
-        filename = os.path.basename(repo_path)
-        if any(filename.endswith(ext) for ext in FILE_EXTENSIONS_TO_SCAN):
-            return [repo_path]
-        else:
-            # Try scanning anyway since user explicitly provided it
-            return [repo_path]
-
-    # If it's a directory
-    all_files = []
-    for root, dirs, files in os.walk(repo_path):
-        for f in files:
-            if any(f.endswith(ext) for ext in FILE_EXTENSIONS_TO_SCAN):
-                all_files.append(os.path.join(root, f))
-    return all_files
+    def fetch_one(repo_input: str) -> Optional[str]:
+        try:
+            return fetch_code_source(repo_input, use_cache=use_cache)
+        except FetchError as e:
+            logger.error(f"Error: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(repo_inputs)))) as executor:
+        return list(executor.map(fetch_one, repo_inputs))
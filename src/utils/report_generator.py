@@ -1,7 +1,9 @@
 # src/utils/report_generator.py
+import io
 import os
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, TextIO
+from src.utils.config import REPORT_DESCRIPTION_MAX_CHARS
 from src.utils.logger import logger
 from urllib.parse import urlparse
 
@@ -28,9 +30,22 @@ def get_report_filename(repo_input: str) -> str:
     
     return f"{repo_name}_scan_{timestamp}.md"
 
-def generate_report(all_scan_results: Dict[str, Dict[str, Any]], output_dir: str = "reports") -> str:
+def _shorten(text: Any, max_chars: int) -> Any:
+    """ `text` cut to at most `max_chars` characters, ending in an ellipsis. Non-strings and max_chars=0 leave it unchanged. """
+    if max_chars and isinstance(text, str) and len(text) > max_chars:
+        return text[:max_chars - 1] + "…"
+    return text
+
+def generate_report(all_scan_results: Dict[str, Dict[str, Any]], output_dir: str = "reports",
+                    out: Optional[TextIO] = None,
+                    max_description_chars: int = REPORT_DESCRIPTION_MAX_CHARS) -> Optional[str]:
     """
     Generate a human-readable Markdown report from the plugin-based results.
+    The report is returned as a string, or, if `out` (a text file object) is given,
+    written to it line by line as it is generated and None is returned, so a huge
+    report is never held in memory all at once.
+    Vulnerability descriptions and Bandit issue texts are shortened to
+    max_description_chars (0 = keep them whole).
     all_scan_results structure:
     {
       "RegexPlugin": { ... },
@@ -41,8 +56,13 @@ def generate_report(all_scan_results: Dict[str, Dict[str, Any]], output_dir: str
     """
     logger.debug("Generating plugin-based report.")
 
-    report_lines = []
-    report_lines.append("# RepoScan Report\n")
+    stream = out if out is not None else io.StringIO()
+    stream.write("# RepoScan Report\n")
+
+    def emit(line: str) -> None:
+        # Lines are newline-separated, with no newline after the last one
+        stream.write("\n")
+        stream.write(line)
 
     # We'll track some basic summary data
     plugin_issue_counts = {}
@@ -89,14 +109,14 @@ def generate_report(all_scan_results: Dict[str, Dict[str, Any]], output_dir: str
     total_plugins = len(all_scan_results)
     total_issues = sum(plugin_issue_counts.values())
 
-    report_lines.append(f"**Summary:** {total_plugins} plugins ran. Detected potential issues in {total_issues} categories/files.\n")
+    emit(f"**Summary:** {total_plugins} plugins ran. Detected potential issues in {total_issues} categories/files.\n")
     
     # 3. Detailed results, plugin-by-plugin
     for plugin_name, plugin_data in all_scan_results.items():
-        report_lines.append(f"\n## Plugin: {plugin_name}\n")
+        emit(f"\n## Plugin: {plugin_name}\n")
         # If plugin_data is empty, we can say “No issues found”
         if not plugin_data:
-            report_lines.append("No issues found by this plugin.\n")
+            emit("No issues found by this plugin.\n")
             continue
 
         # Now handle each plugin type in a specialized way
@@ -107,43 +127,44 @@ def generate_report(all_scan_results: Dict[str, Dict[str, Any]], output_dir: str
             #    ...
             # }
             for file_path, pattern_dict in plugin_data.items():
-                report_lines.append(f"### File: `{file_path}`\n")
+                emit(f"### File: `{file_path}`\n")
                 for pattern_name, match_list in pattern_dict.items():
                     # match_list is an array of matched strings
-                    report_lines.append(f"- **{pattern_name}**: {len(match_list)} match(es).")
+                    emit(f"- **{pattern_name}**: {len(match_list)} match(es).")
                     # If you want to show them, we can do something like:
                     # for match in match_list:
-                    #     report_lines.append(f"  - `{match}`")
-                report_lines.append("")  # blank line
+                    #     emit(f"  - `{match}`")
+                emit("")  # blank line
 
         elif plugin_name == "BanditPlugin":
             # plugin_data might be: {"bandit_issues": [ {issue_key: val, ...}, ... ]}
             issues = plugin_data.get("bandit_issues", [])
             if not issues:
-                report_lines.append("No Bandit issues found.\n")
+                emit("No Bandit issues found.\n")
             else:
-                report_lines.append(f"Found {len(issues)} Bandit issue(s):\n")
+                emit(f"Found {len(issues)} Bandit issue(s):\n")
                 for issue in issues:
                     filename = issue.get("filename")
                     line_num = issue.get("line_number")
                     severity = issue.get("issue_severity")
-                    issue_text = issue.get("issue_text", "")
+                    issue_text = _shorten(issue.get("issue_text", ""), max_description_chars)
                     test_name = issue.get("test_name", "")
-                    report_lines.append(f"- **File**: `{filename}` (line {line_num}) | **{severity}**: {issue_text} (rule: {test_name})")
+                    emit(f"- **File**: `{filename}` (line {line_num}) | **{severity}**: {issue_text} (rule: {test_name})")
 
         elif plugin_name == "ESLintPlugin":
-            # Suppose it's { "eslint_issues": [ {...}, ... ] }
+            # { "eslint_issues": [ {"file": ..., "line": ..., ...}, ... ] }
             eslint_issues = plugin_data.get("eslint_issues", [])
             if not eslint_issues:
-                report_lines.append("No ESLint issues found.\n")
+                emit("No ESLint issues found.\n")
             else:
-                report_lines.append(f"Found {len(eslint_issues)} ESLint issue(s):\n")
+                emit(f"Found {len(eslint_issues)} ESLint issue(s):\n")
                 for issue in eslint_issues:
+                    filename = issue.get("file")
                     line = issue.get("line")
                     rule = issue.get("rule")
                     message = issue.get("message")
                     severity = issue.get("severity")
-                    report_lines.append(f"- **Line {line}, {severity}**: {message} (rule: {rule})")
+                    emit(f"- **File**: `{filename}` (line {line}) | **{severity}**: {message} (rule: {rule})")
         
         elif plugin_name == "DependencyPlugin":
             # plugin_data: 
@@ -156,46 +177,44 @@ def generate_report(all_scan_results: Dict[str, Dict[str, Any]], output_dir: str
             #   "dependency_manifest": [...]
             # }
             dep_findings = plugin_data.get("dependency_findings", {})
-            dep_manifest = plugin_data.get("dependency_manifest", [])
+            # Sorted, so reports of the same project diff cleanly whatever order the manifests were walked in
+            dep_manifest = sorted(set(map(str, plugin_data.get("dependency_manifest", []))))
 
             total_vulns = dep_findings.get("total_vulnerabilities", 0)
             dep_issues = dep_findings.get("dependency_issues", [])
             vulnerable_pkgs = dep_findings.get("vulnerable_packages", [])
 
-            report_lines.append(f"**Dependency Manifest** ({len(dep_manifest)} total):\n")
+            emit(f"**Dependency Manifest** ({len(dep_manifest)} total):\n")
             if dep_manifest:
-                # list them
-                for pkg in dep_manifest:
-                    report_lines.append(f"- {pkg}")
+                # list them, as one block: map() and join() do the per-package work in C
+                emit("\n".join(map("- {}".format, dep_manifest)))
             else:
-                report_lines.append("No dependencies found.\n")
+                emit("No dependencies found.\n")
 
-            report_lines.append(f"\n**Vulnerability Check**\n")
-            report_lines.append(f"- Total Known Vulnerabilities: {total_vulns}")
+            emit(f"\n**Vulnerability Check**\n")
+            emit(f"- Total Known Vulnerabilities: {total_vulns}")
             if dep_issues:
-                report_lines.append(f"- Detailed issues ({len(dep_issues)}):")
+                emit(f"- Detailed issues ({len(dep_issues)}):")
                 for issue in dep_issues:
                     pkg = issue.get("package")
                     version = issue.get("version")
                     vulns_list = issue.get("vulnerabilities", [])
-                    report_lines.append(f"  - **{pkg}@{version}** has {len(vulns_list)} vulnerability(ies)")
+                    emit(f"  - **{pkg}@{version}** has {len(vulns_list)} vulnerability(ies)")
                     for v in vulns_list:
                         vid = v.get("id", "N/A")
-                        desc = v.get("description", "")
+                        desc = _shorten(v.get("description", ""), max_description_chars)
                         severity = v.get("severity", "unknown")
-                        report_lines.append(f"    - {vid} ({severity}): {desc}")
+                        emit(f"    - {vid} ({severity}): {desc}")
             else:
-                report_lines.append("No dependency-related issues found.")
+                emit("No dependency-related issues found.")
 
         else:
             # Fallback for unknown plugin: just dump plugin_data
-            report_lines.append("**Raw Plugin Data**:\n")
-            report_lines.append(f"```\n{plugin_data}\n```")
+            emit("**Raw Plugin Data**:\n")
+            emit(f"```\n{plugin_data}\n```")
 
-    report_lines.append("\n---\n*End of Report*\n")
-    report_content = "\n".join(report_lines)
-    
+    emit("\n---\n*End of Report*\n")
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
-    return report_content
+    return stream.getvalue() if out is None else None
@@ -0,0 +1,56 @@
+"""
+Run several external tool invocations concurrently.
+
+Plugins that shell out (ESLint, Bandit, ...) spend most of their time waiting
+on child processes, so we start them with asyncio and let the waits overlap
+instead of running one blocking subprocess.run() after another.
+"""
+
+import asyncio
+import os
+from typing import List, NamedTuple, Optional, Sequence
+
+from src.utils.logger import logger
+
+
+class CommandResult(NamedTuple):
+    """
+    Outcome of one command. returncode is None if the command could not be started.
+    stdout is left as bytes, since it is usually JSON that fast_json.loads() parses directly.
+    """
+    returncode: Optional[int]
+    stdout: bytes
+    stderr: str
+
+
+async def run_command(cmd: Sequence[str], semaphore: asyncio.Semaphore) -> CommandResult:
+    """
+    Run `cmd` once a slot in `semaphore` is free, and capture its output.
+    Startup failures (e.g. tool missing) are logged and returned, not raised.
+    """
+    async with semaphore:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await proc.communicate()
+        except OSError as e:
+            logger.error(f"Could not run {cmd[0]}: {e}")
+            return CommandResult(None, b"", str(e))
+
+    return CommandResult(
+        proc.returncode,
+        stdout,
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+async def run_commands(cmds: List[Sequence[str]], max_concurrency: Optional[int] = None) -> List[CommandResult]:
+    """
+    Run all of `cmds` with at most `max_concurrency` (default: CPU count) alive at once.
+    Results come back in the same order as `cmds`.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or os.cpu_count() or 1)
+    return await asyncio.gather(*(run_command(cmd, semaphore) for cmd in cmds))
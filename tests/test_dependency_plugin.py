@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from src.plugins.dependency_plugin import DependencyPlugin
+
+
+class ParseRequirementsTxtTest(unittest.TestCase):
+
+    def parse(self, text: str) -> list:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write(text)
+        try:
+            return DependencyPlugin(use_cache=False).parse_requirements_txt(f.name)
+        finally:
+            os.unlink(f.name)
+
+    def test_pins_and_specifiers(self):
+        self.assertEqual(
+            self.parse("requests==2.31.0\nflask >= 1.2, < 2\nclick\nrequests[security]==2.19.0\n"),
+            [("requests", "2.31.0"), ("flask", ">=1.2,<2"), ("click", ""), ("requests[security]", "2.19.0")],
+        )
+
+    def test_comments_and_markers_are_dropped(self):
+        self.assertEqual(
+            self.parse("# pinned\nsix==1.16.0  # why\nenum34==1.1.10; python_version < '3.4'\n"),
+            [("six", "1.16.0"), ("enum34", "1.1.10")],
+        )
+
+    def test_hash_options_and_continuations(self):
+        self.assertEqual(
+            self.parse(
+                "Django==1.11.0 --hash=sha256:abc\n"
+                "flask==0.12 \\\n"
+                "    --hash=sha256:def \\\n"
+                "    --hash=sha256:0123\n"
+                "jinja2==3.1.2\n"
+            ),
+            [("Django", "1.11.0"), ("flask", "0.12"), ("jinja2", "3.1.2")],
+        )
+
+    def test_option_url_and_vcs_lines_are_skipped(self):
+        self.assertEqual(
+            self.parse(
+                "-r other.txt\n"
+                "-e .\n"
+                "--index-url https://pypi.example.org/simple\n"
+                "git+https://github.com/user/repo.git#egg=repo\n"
+                "https://example.org/pkg-1.0.tar.gz\n"
+                "pkg @ https://example.org/pkg-1.0.tar.gz\n"
+                "./local/dir\n"
+                "attrs==23.1.0\n"
+            ),
+            [("attrs", "23.1.0")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
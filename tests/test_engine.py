@@ -0,0 +1,42 @@
+import unittest
+from unittest import mock
+
+from src.patterns import engine
+from src.patterns.engine import PresenceFilter
+from src.plugins.regex_plugin import _ALL_PATTERNS_BYTES
+
+SAMPLES = [
+    b"import\x0bsmtplib\n",
+    b"x = eval\x0b(payload)\n",
+    b"\xff\xfe\x00import socket\n\xc3(",
+    b"\xe9eval(\x80)\n",
+    b"url = 'http://example.com/\xa0\xff'\n",
+    b"exec(\xc3\x28)\x0c\n",
+]
+
+
+class PresenceFilterTest(unittest.TestCase):
+
+    def assert_matches_re(self, presence: PresenceFilter):
+        for content in SAMPLES:
+            expected = {name for name, regex in _ALL_PATTERNS_BYTES.items() if regex.search(content)}
+            found = presence.matching(content)
+            self.assertIsNotNone(found)
+            # Unsupported patterns are always reported; everything else must agree with re
+            self.assertEqual(found - presence.unsupported, expected - presence.unsupported, content)
+            self.assertLessEqual(expected, found, content)
+
+    @unittest.skipIf(engine.hyperscan is None, "hyperscan not installed")
+    def test_hyperscan_matches_re(self):
+        self.assert_matches_re(PresenceFilter(_ALL_PATTERNS_BYTES))
+
+    @unittest.skipIf(engine.re2 is None, "google-re2 not installed")
+    def test_re2_matches_re(self):
+        with mock.patch.object(engine, "hyperscan", None):
+            presence = PresenceFilter(_ALL_PATTERNS_BYTES)
+        self.assertIsNotNone(presence._set)
+        self.assert_matches_re(presence)
+
+
+if __name__ == "__main__":
+    unittest.main()